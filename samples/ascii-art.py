@@ -32,7 +32,7 @@ def do_switching():
 
 def on_update():
     if VALUES["on"]:
-        obs.run(do_switching)
+        obs.run(do_switching, replace=True)
 
 
 obs.ready(globals())
@@ -19,11 +19,11 @@ PROPERTIES = [
 ]
 
 
-def set_sync_delay(source, delay):
+def set_sync_delay(source, delay, filters):
     if not (-10000 < delay < 10000):
         #print("Invalid delay:", delay)
         return
-    for f in source.get_filters():
+    for f in filters:
         if f.get_type() in {"async_delay_filter", "gpu_delay"}:
             #print(source.name, f["delay_ms",].get("delay_ms", 0), "to", delay, "(video)")
             f["delay_ms"] = delay
@@ -45,12 +45,15 @@ def do_update():
                 min_delay = d
             offsets.append((s, d))
     if min_delay is not None:
-        for s, d in offsets:
-            set_sync_delay(s, d - min_delay)
+        with obs.batch():
+            filters = [s.get_filters() for s, d in offsets]
+        with obs.batch():
+            for (s, d), f in zip(offsets, filters):
+                set_sync_delay(s, d - min_delay, f.result())
 
 
 def on_update():
-    obs.run(do_update)
+    obs.run(do_update, replace=True)
 
 
 obs.ready(globals())
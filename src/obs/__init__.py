@@ -1,11 +1,158 @@
 import obspython as _obs
+import concurrent.futures as _futures
+import inspect as _inspect
 from . import data as _data
 from . import loop as _loop
 from . import props as _props
 
-def run(callable):
+def run(callable, *, replace=False, limit=None):
+    """Runs 'callable' on a worker thread.
+
+    Pass 'replace=True' to stop any earlier call of the same function that
+    is still queued or running. Pass 'limit' to restrict how many functions
+    from the same script may run at once; the rest wait their turn.
+
+    Worker threads are shared by all scripts, and there are at most 8 of
+    them unless changed with 'configure(workers=...)'. A function that
+    never returns keeps its thread for good, so once every thread is busy
+    further calls wait and a RuntimeWarning is issued. Signal callbacks
+    registered with 'Source.on' do not use these threads.
+    """
+    _loop.LOOP.start()
+    _loop.LOOP.run(callable, replace=replace, limit=limit)
+
+
+def run_async(coro):
+    """Runs a coroutine on the shared event loop used by all scripts.
+
+    Use the '_async' methods on sources and scene items within the
+    coroutine to wait for results without blocking other coroutines.
+    """
     _loop.LOOP.start()
-    _loop.LOOP.schedule("new_thread", callable)
+    return _loop.LOOP.run_async(coro)
+
+
+def wait(futures, timeout=None, return_when=_futures.ALL_COMPLETED):
+    """Waits for multiple futures, such as those returned by the '_async'
+    methods on sources and scene items.
+
+    Returns a (done, not_done) pair of sets, like 'concurrent.futures.wait'.
+    """
+    futures = list(futures)
+    for f in futures:
+        if isinstance(f, _loop.Future):
+            f._flush()
+    return _futures.wait(futures, timeout, return_when)
+
+
+def gather(*futures, timeout=None):
+    """Waits for all futures to complete and returns a list of their results.
+
+    Raises TimeoutError if they are not all complete within 'timeout' seconds.
+    """
+    done, not_done = wait(futures, timeout)
+    if not_done:
+        raise TimeoutError()
+    return [f.result() for f in futures]
+
+
+def batch():
+    """Sends all operations made on the current thread within a 'with'
+    block to OBS as a single step.
+
+    Reads inside the block return futures rather than values. Call
+    'result()' on them after the block to get the value.
+
+    Coroutines started with 'run_async' share a thread and cannot use
+    batches, so this raises RuntimeError inside them.
+    """
+    return _loop.LOOP.batch()
+
+
+QueueFull = _loop.QueueFull
+StepExpired = _loop.StepExpired
+
+
+def configure(*, budget=None, coalesce=None, workers=None,
+              max_steps=None, overflow=None, quotas=None, driver=None,
+              settings_cache=None, diff_updates=None):
+    """Configures the shared loop that runs operations on the OBS thread.
+
+    'budget' is the maximum time in milliseconds to spend running queued
+    operations each tick. At least one operation is always run.
+
+    'coalesce' enables replacing queued writes (such as setting a property,
+    position or sync offset) when a newer write to the same target is made
+    before the earlier one has run.
+
+    'workers' is the maximum number of threads used for 'obs.run'.
+
+    'max_steps' limits the number of queued operations, and 'quotas' is a
+    dict mapping script module names to the number of operations each may
+    have queued. 'overflow' selects what happens when a limit is reached:
+    "block" waits for room, "drop" discards the oldest queued write, and
+    "raise" raises QueueFull. Operations are never blocked or dropped on
+    the OBS thread, and coroutines started with 'run_async' get QueueFull
+    rather than blocking the event loop they share.
+
+    'driver' is "timer" to run queued operations every 10 milliseconds, or
+    "tick" to run them once per video frame only while any are waiting.
+
+    'settings_cache' keeps a snapshot of each source's settings after it is
+    first read, and serves later reads from it until OBS reports that the
+    source was updated.
+
+    'diff_updates' compares new property values against the source's
+    current settings before writing them, and only sends the ones that
+    changed. Writes that change nothing do not update the source at all.
+    """
+    if budget is not None:
+        if budget <= 0:
+            raise ValueError("budget must be positive")
+        _loop.LOOP.budget = budget
+    if coalesce is not None:
+        _loop.LOOP.coalesce = bool(coalesce)
+    if workers is not None:
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        _loop.LOOP._pool.max_workers = workers
+    if max_steps is not None:
+        _loop.LOOP.max_steps = max_steps or None
+    if overflow is not None:
+        if overflow not in ("block", "drop", "raise"):
+            raise ValueError("overflow must be 'block', 'drop' or 'raise'")
+        _loop.LOOP.overflow = overflow
+    if quotas is not None:
+        _loop.LOOP.quotas.update(quotas)
+    if driver is not None:
+        _loop.LOOP.set_driver(driver)
+    if settings_cache is not None:
+        _loop.LOOP.settings_cache = bool(settings_cache)
+        if not settings_cache:
+            _loop.LOOP._sources.clear()
+    if diff_updates is not None:
+        _loop.LOOP.diff_updates = bool(diff_updates)
+
+
+def loop_stats(clear=False):
+    """Returns a dict of statistics about operations run on the OBS thread.
+
+    Times are in seconds. 'commands' contains the number of times each
+    operation ran, the total and maximum time it waited in the queue, the
+    total time it took to run, and a histogram of queue waits as a list of
+    (upper bound in milliseconds, count) pairs. 'scripts' contains the
+    number of operations and total run time for each script that used
+    'obs.run'.
+
+    Pass 'clear=True' to reset the counters after reading them.
+    """
+    l = _loop.LOOP
+    stats = l.stats
+    if clear:
+        # Swap in new counters rather than resetting these while the OBS
+        # thread may be updating them.
+        l.stats = _loop._Stats()
+    return stats.snapshot(len(l.steps) - l._superseded)
 
 
 def get_source(source):
@@ -19,6 +166,14 @@ def get_sceneitem(scene, source):
     return SceneItem(scene, Source(source))
 
 
+def _accepts_arg(fn):
+    try:
+        _inspect.signature(fn).bind(None)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
 def ready(globals):
     try:
         desc = globals["__doc__"]
@@ -41,13 +196,42 @@ def ready(globals):
                  if k.startswith("on_") and k.endswith("_changed")
                  and callable(v)}
 
+        # The values each 'on_<name>_changed' handler was last called with,
+        # and the values read by the last 'script_update'.
+        DELIVERED = {}
+        SEEN = {}
+
+        # Each property is read with its own compiled reader, so handlers
+        # get the same converted values here as from 'updated'.
+        ELEMENTS = {}
+        READERS = {}
+
+        def add_elements(elements):
+            for e in elements:
+                ELEMENTS[e.name] = e
+                add_elements(getattr(e, "elements", ()))
+        add_elements(PROPS)
+
+        def read_value(data, n):
+            read = READERS.get(n)
+            if read is None and n in ELEMENTS:
+                read = READERS[n] = _props.compile_reader([ELEMENTS[n]])
+            values = read(data) if read else {}
+            try:
+                return values[n]
+            except KeyError:
+                # Properties that elements add for themselves or read under
+                # another name, such as the item list of a SceneItemList or
+                # a migrated value, are read as stored.
+                return _data.get_value(data, n)
+
         def on_prop_changed(properties, prop, data=None):
             n = _obs.obs_property_name(prop)
             k = "on_{}_changed".format(n)
             v = None
             if data:
                 try:
-                    VALUES[n] = v = _data.get_value(data, n)
+                    VALUES[n] = v = read_value(data, n)
                 except LookupError:
                     pass
             try:
@@ -55,6 +239,7 @@ def ready(globals):
             except KeyError:
                 pass
             else:
+                DELIVERED[n] = v
                 return fn(v)
 
         def script_properties():
@@ -68,10 +253,29 @@ def ready(globals):
             ON_UPDATE = globals["on_update"]
         except LookupError:
             ON_UPDATE = None
+        PASS_CHANGED = _accepts_arg(ON_UPDATE)
+
+        def updated(values):
+            changed = {k for k, v in values.items() if k not in SEEN or SEEN[k] != v}
+            SEEN.update(values)
+            VALUES.update(values)
+            for n in sorted(changed):
+                fn = FUNCS.get("on_{}_changed".format(n))
+                if fn and (n not in DELIVERED or DELIVERED[n] != values[n]):
+                    DELIVERED[n] = values[n]
+                    fn(values[n])
+            # Handlers that take no arguments are only called when something
+            # changed, and otherwise are passed the set of changed names.
+            if ON_UPDATE and PASS_CHANGED:
+                ON_UPDATE(changed)
+            elif ON_UPDATE and changed:
+                ON_UPDATE()
+
+        READ = _props.compile_reader(PROPS)
 
         def script_update(data):
             _loop.LOOP.start()
-            _loop.LOOP.schedule("updated", PROPS, data, VALUES, ON_UPDATE)
+            _loop.LOOP.schedule("updated", READ, data, updated)
 
         globals["script_properties"] = script_properties
         globals["script_update"] = script_update
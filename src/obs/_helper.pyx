@@ -2,6 +2,7 @@
 # cython: language_level=3
 
 from _obs cimport *
+from cpython.buffer cimport PyBUF_FORMAT, PyBUF_ND, PyBUF_STRIDES, PyBUF_WRITABLE
 from cpython.ref cimport PyObject
 
 cdef extern from "Python.h":
@@ -10,14 +11,139 @@ cdef extern from "Python.h":
 
 import sys
 
+from time import monotonic
+
+from collections.abc import ItemsView, KeysView, Mapping, Sequence, ValuesView
+
+cdef class _RenderPool:
+    """Keeps texrenders and staging surfaces for reuse between renders.
+
+    Objects that have not been used for 'idle_timeout' seconds are destroyed
+    on the next render, and at most 'max_per_key' are kept for each format
+    and size. Objects may only be destroyed inside the graphics context, so
+    the pool hands them back to the caller rather than destroying them.
+    """
+    cdef dict texrenders
+    cdef dict surfaces
+    cdef public double idle_timeout
+    cdef public int max_per_key
+
+    def __cinit__(self):
+        self.texrenders = {}
+        self.surfaces = {}
+        self.idle_timeout = 5.0
+        self.max_per_key = 3
+
+    cdef size_t take(self, dict pool, key):
+        items = pool.get(key)
+        if items:
+            return items.pop()[0]
+        return 0
+
+    cdef list put(self, dict pool, key, size_t obj):
+        items = pool.setdefault(key, [])
+        items.append((obj, monotonic()))
+        if len(items) > self.max_per_key:
+            # Drop the least recently used
+            return [items.pop(0)[0]]
+        return []
+
+    cdef list trim(self, dict pool, bint all=False):
+        cdef list expired = []
+        cutoff = monotonic() - self.idle_timeout
+        for key in list(pool):
+            items = pool[key]
+            while items and (all or items[0][1] < cutoff):
+                expired.append(items.pop(0)[0])
+            if not items:
+                del pool[key]
+        return expired
+
+
+cdef _RenderPool _POOL = _RenderPool()
+
+
+cdef void _destroy_pooled(list texrenders, list surfaces) except *:
+    cdef size_t p
+    if not texrenders and not surfaces:
+        return
+    with nogil:
+        obs_enter_graphics()
+    try:
+        for p in texrenders:
+            gs_texrender_destroy(<void*>p)
+        for p in surfaces:
+            gs_stagesurface_destroy(<void*>p)
+    finally:
+        obs_leave_graphics()
+
+
+def clear_render_pool():
+    """Destroys all pooled texrenders and staging surfaces."""
+    _destroy_pooled(_POOL.trim(_POOL.texrenders, True), _POOL.trim(_POOL.surfaces, True))
+
+
 cdef class RenderedData:
+    """A frame captured from a source and mapped into memory.
+
+    Rows are available by iterating or indexing, or without copying through
+    the buffer protocol, for example with 'memoryview(data)'. The buffer has
+    shape (height, width) for single channel formats and (height, width,
+    depth) otherwise. Closing while a buffer is exported is deferred until
+    the last one is released.
+    """
     cdef void *stagesurf
     cdef public unsigned int width, height, depth
     cdef unsigned char *texdata
     cdef unsigned int linesize
+    cdef uint32_t format
+    cdef Py_ssize_t shape[3]
+    cdef Py_ssize_t strides[3]
+    cdef int exports
+    cdef bint close_pending
 
     def __cinit__(self):
         self.stagesurf = NULL
+        self.exports = 0
+        self.close_pending = False
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        if not self.stagesurf or self.close_pending:
+            raise ValueError("frame data is closed")
+        if flags & PyBUF_WRITABLE:
+            raise BufferError("frame data is read-only")
+        if not (flags & PyBUF_STRIDES) and self.linesize != self.width * self.depth:
+            raise BufferError("frame data rows are not contiguous")
+        self.shape[0] = self.height
+        self.shape[1] = self.width
+        self.shape[2] = self.depth
+        self.strides[0] = self.linesize
+        self.strides[1] = self.depth
+        self.strides[2] = 1
+        buffer.buf = self.texdata
+        buffer.obj = self
+        buffer.len = self.height * self.width * self.depth
+        buffer.readonly = 1
+        buffer.itemsize = 1
+        buffer.format = NULL
+        if flags & PyBUF_FORMAT:
+            buffer.format = "B"
+        if flags & PyBUF_ND:
+            buffer.ndim = 2 if self.depth == 1 else 3
+            buffer.shape = self.shape
+        else:
+            # Without a shape, consumers see the rows as one flat array
+            buffer.ndim = 1
+            buffer.shape = NULL
+        buffer.strides = self.strides if flags & PyBUF_STRIDES else NULL
+        buffer.suboffsets = NULL
+        buffer.internal = NULL
+        self.exports += 1
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        self.exports -= 1
+        if not self.exports and self.close_pending:
+            self.close()
 
     def __iter__(self):
         i = 0
@@ -49,41 +175,125 @@ cdef class RenderedData:
         raise TypeError("argument must be a row index or list of (x, y) pairs")
 
     def close(self):
+        if self.exports:
+            # The surface is reused after closing, so wait until nobody can
+            # read it through a buffer.
+            self.close_pending = True
+            return
         s = self.stagesurf
         self.stagesurf = NULL
         if s:
             with nogil:
                 obs_enter_graphics()
                 gs_stagesurface_unmap(s)
-                gs_stagesurface_destroy(s)
                 obs_leave_graphics()
+            _destroy_pooled([], _POOL.put(_POOL.surfaces, (self.width, self.height, self.format), <size_t>s))
 
     def __dealloc__(self):
         self.close()
 
 
-def render_source_to_data(size_t source, uint32_t color_depth=GS_R8):
+FRAME_FORMATS = {
+    "r8": GS_R8,
+    "a8": GS_A8,
+    "rgba": GS_RGBA,
+    "bgra": GS_BGRA,
+}
+
+
+def render_source_to_data(size_t source, uint32_t color_depth=GS_R8, region=None, size=None):
+    """Renders 'source' and maps the result into memory.
+
+    'region' is an (x, y, width, height) rectangle of the source to render,
+    and 'size' is the (width, height) to scale it to on the GPU. By default,
+    the whole source is rendered at its own size.
+    """
+    return _render(<void*>source, color_depth, None, region, size)
+
+
+cdef class FramePipeline:
+    """Captures frames from a source with one frame of latency.
+
+    Each capture copies the new frame into a staging surface and maps the
+    one copied by the previous capture, which the GPU has usually finished
+    with by then, so the graphics thread does not wait for the copy.
+    """
+    cdef size_t pending
+    cdef uint32_t width, height, format
+
+    def __cinit__(self):
+        self.pending = 0
+
+    def capture(self, size_t source, uint32_t color_depth=GS_R8, region=None, size=None):
+        return _render(<void*>source, color_depth, self, region, size)
+
+    def close(self):
+        p = self.pending
+        self.pending = 0
+        if p:
+            _destroy_pooled([], _POOL.put(_POOL.surfaces, (self.width, self.height, self.format), p))
+
+    def __dealloc__(self):
+        self.close()
+
+
+cdef RenderedData _render(void *s, uint32_t color_depth, FramePipeline pipeline, region, size):
     cdef void *texrender = NULL
     cdef void *stagesurf = NULL
+    cdef void *stagesurf2 = NULL
+    cdef void *pending = NULL
+    cdef void *mapsurf
     cdef RenderedData r = RenderedData()
     cdef vec4 zero
+    cdef uint32_t cx, cy
+    cdef float left, top, right, bottom
+    cdef bint ok = False
 
-    # TODO: support greater depth
     if color_depth == GS_R8 or color_depth == GS_A8:
         r.depth = 1
+    elif color_depth == GS_RGBA or color_depth == GS_BGRA:
+        r.depth = 4
     else:
         raise ValueError("unsupported color depth")
 
-    cdef void *s = <void*>source
+    if region is None:
+        left = top = 0
+        right = obs_source_get_width(s)
+        bottom = obs_source_get_height(s)
+    else:
+        left, top, right, bottom = region
+        right += left
+        bottom += top
+        if right <= left or bottom <= top:
+            raise ValueError("region must have a positive width and height")
+    if size is None:
+        cx = <uint32_t>(right - left)
+        cy = <uint32_t>(bottom - top)
+    else:
+        cx, cy = size
+    r.width = cx
+    r.height = cy
+    r.format = color_depth
+    key = (cx, cy, color_depth)
+    texrender = <void*>_POOL.take(_POOL.texrenders, color_depth)
+    stagesurf = <void*>_POOL.take(_POOL.surfaces, key)
+    if pipeline is not None:
+        if pipeline.pending and (pipeline.width, pipeline.height, pipeline.format) == key:
+            pending = <void*>pipeline.pending
+            pipeline.pending = 0
+        else:
+            # Nothing usable was staged last time, so stage this frame twice
+            # and map one copy now.
+            pipeline.close()
+            stagesurf2 = <void*>_POOL.take(_POOL.surfaces, key)
+    _destroy_pooled(_POOL.trim(_POOL.texrenders), _POOL.trim(_POOL.surfaces))
 
     try:
         with nogil:
             obs_enter_graphics()
 
-            r.width = cx = obs_source_get_width(s)
-            r.height = cy = obs_source_get_height(s)
-
-            texrender = gs_texrender_create(color_depth, GS_ZS_NONE)
+            if not texrender:
+                texrender = gs_texrender_create(color_depth, GS_ZS_NONE)
             gs_texrender_reset(texrender)
 
             if not gs_texrender_begin(texrender, cx, cy):
@@ -91,7 +301,8 @@ def render_source_to_data(size_t source, uint32_t color_depth=GS_R8):
             try:
                 vec4_zero(&zero)
                 gs_clear(GS_CLEAR_COLOR, &zero, 0.0, 0)
-                gs_ortho(0.0, cx, 0.0, cy, -100.0, 100.0)
+                # Project only the region onto the target, which scales it
+                gs_ortho(left, right, top, bottom, -100.0, 100.0)
                 gs_blend_state_push()
                 gs_blend_function(GS_BLEND_ONE, GS_BLEND_ZERO)
                 obs_source_inc_showing(s)
@@ -102,18 +313,72 @@ def render_source_to_data(size_t source, uint32_t color_depth=GS_R8):
                 gs_texrender_end(texrender)
 
             texture = gs_texrender_get_texture(texrender)
-            stagesurf = gs_stagesurface_create(cx, cy, color_depth)
+            if not stagesurf:
+                stagesurf = gs_stagesurface_create(cx, cy, color_depth)
             gs_stage_texture(stagesurf, texture)
-            gs_stagesurface_map(stagesurf, &r.texdata, &r.linesize)
-            r.stagesurf = stagesurf
+            if pending:
+                mapsurf, pending = pending, stagesurf
+            else:
+                mapsurf = stagesurf
+                if pipeline is not None:
+                    if not stagesurf2:
+                        stagesurf2 = gs_stagesurface_create(cx, cy, color_depth)
+                    gs_stage_texture(stagesurf2, texture)
+                    pending, stagesurf2 = stagesurf2, NULL
             stagesurf = NULL
+            gs_stagesurface_map(mapsurf, &r.texdata, &r.linesize)
+            r.stagesurf = mapsurf
+        ok = True
         return r
     finally:
-        if stagesurf:
-            gs_stagesurface_destroy(stagesurf)
-        if texrender:
-            gs_texrender_destroy(texrender)
         obs_leave_graphics()
+        if pipeline is not None and pending:
+            pipeline.pending = <size_t>pending
+            pipeline.width, pipeline.height, pipeline.format = cx, cy, color_depth
+        # Objects that failed to render are not reused
+        if ok:
+            expired = _POOL.put(_POOL.texrenders, color_depth, <size_t>texrender)
+            _destroy_pooled(expired, [])
+        else:
+            _destroy_pooled([<size_t>texrender] if texrender else [],
+                            [<size_t>p for p in (<size_t>stagesurf, <size_t>stagesurf2) if p])
+
+
+cdef void _tick_callback(void *param, float seconds) nogil:
+    with gil:
+        try:
+            (<TickCallback>param).callback()
+        except Exception as ex:
+            PyErr_WriteUnraisable(NULL)
+
+
+cdef class TickCallback:
+    """Calls 'callback' once per video frame while added.
+
+    OBS holds its callback lock while calling tick callbacks, so we release
+    the GIL while adding or removing to avoid deadlocking with a tick that
+    is waiting for it.
+
+    OBS keeps one registration per call to 'add', and 'remove' drops one of
+    them. The owner must track whether the callback is added, so that the
+    decision and the state change happen together under its own lock.
+    """
+    cdef public object callback
+
+    def __cinit__(self, callback):
+        self.callback = callback
+
+    def add(self):
+        with nogil:
+            obs_add_tick_callback(_tick_callback, <void*>self)
+
+    def remove(self):
+        with nogil:
+            obs_remove_tick_callback(_tick_callback, <void*>self)
+
+    def __dealloc__(self):
+        # Removing a callback that is not added does nothing
+        self.remove()
 
 
 def get_property_names(size_t properties):
@@ -143,42 +408,104 @@ def read_data(size_t data, names):
 
 cdef object _read_data(void *data, object names):
     cdef str n
+    cdef bytes b
     cdef void *d
-    cdef uint32_t dtype
-    cdef void *o
-    cdef bytes s
-    d = obs_data_first(data)
     r = {}
+    if names:
+        # Look up only the requested items rather than converting them all
+        for n in names:
+            b = n.encode("utf-8")
+            d = obs_data_item_byname(data, b)
+            if d:
+                try:
+                    r[n] = _read_item(d)
+                finally:
+                    obs_data_item_release(&d)
+        return r
+    d = obs_data_first(data)
     while d:
         n = obs_data_item_get_name(d).decode()
-        if n and (not names or n in names):
-            dtype = obs_data_item_gettype(d)
-            if dtype == OBS_DATA_NULL:
-                r[n] = None
-            elif dtype == OBS_DATA_STRING:
-                s = obs_data_item_get_string(d)
-                r[n] = s.decode()
-            elif dtype == OBS_DATA_NUMBER:
-                dtype = obs_data_item_numtype(d)
-                if dtype == OBS_DATA_NUM_INT:
-                    r[n] = obs_data_item_get_int(d)
-                elif dtype == OBS_DATA_NUM_DOUBLE:
-                    r[n] = obs_data_item_get_double(d)
-                else:
-                    r[n] = f"Unhandled numtype: {dtype}"
-            elif dtype == OBS_DATA_BOOLEAN:
-                r[n] = obs_data_item_get_bool(d)
-            elif dtype == OBS_DATA_OBJECT or dtype == OBS_DATA_ARRAY:
-                o = obs_data_item_get_obj(d)
-                r[n] = _read_data(o, None)
-                obs_data_release(o)
-            else:
-                r[n] = f"Unhandled type: {dtype}"
+        if n:
+            r[n] = _read_item(d)
         if not obs_data_item_next(&d):
             break
     return r
 
 
+cdef object _read_item(void *d):
+    cdef uint32_t dtype
+    cdef void *o
+    cdef bytes s
+    dtype = obs_data_item_gettype(d)
+    if dtype == OBS_DATA_NULL:
+        return None
+    elif dtype == OBS_DATA_STRING:
+        s = obs_data_item_get_string(d)
+        return s.decode()
+    elif dtype == OBS_DATA_NUMBER:
+        dtype = obs_data_item_numtype(d)
+        if dtype == OBS_DATA_NUM_INT:
+            return obs_data_item_get_int(d)
+        elif dtype == OBS_DATA_NUM_DOUBLE:
+            return obs_data_item_get_double(d)
+        return f"Unhandled numtype: {dtype}"
+    elif dtype == OBS_DATA_BOOLEAN:
+        return obs_data_item_get_bool(d)
+    elif dtype == OBS_DATA_OBJECT:
+        o = obs_data_item_get_obj(d)
+        try:
+            return _read_data(o, None)
+        finally:
+            obs_data_release(o)
+    elif dtype == OBS_DATA_ARRAY:
+        o = obs_data_item_get_array(d)
+        try:
+            return _read_data_array(o) if o else []
+        finally:
+            obs_data_array_release(o)
+    return f"Unhandled type: {dtype}"
+
+
+def data_size(size_t data, size_t limit):
+    """Counts the items in 'data', including nested items, up to 'limit'."""
+    if not data:
+        return 0
+    return _data_size(<void*>data, limit)
+
+
+cdef size_t _data_size(void *data, size_t limit):
+    cdef size_t count = 0
+    cdef size_t i
+    cdef uint32_t dtype
+    cdef void *d = obs_data_first(data)
+    cdef void *o
+    cdef void *a
+    while d and count < limit:
+        count += 1
+        dtype = obs_data_item_gettype(d)
+        if dtype == OBS_DATA_OBJECT:
+            o = obs_data_item_get_obj(d)
+            if o:
+                count += _data_size(o, limit - count)
+                obs_data_release(o)
+        elif dtype == OBS_DATA_ARRAY:
+            a = obs_data_item_get_array(d)
+            if a:
+                i = 0
+                while i < obs_data_array_count(a) and count < limit:
+                    o = obs_data_array_item(a, i)
+                    if o:
+                        count += 1 + _data_size(o, limit - count)
+                        obs_data_release(o)
+                    i += 1
+                obs_data_array_release(a)
+        if not obs_data_item_next(&d):
+            break
+    if d:
+        obs_data_item_release(&d)
+    return count
+
+
 def read_data_array(size_t data_array):
     if not data_array:
         return []
@@ -200,6 +527,321 @@ cdef object _read_data_array(void* data_array):
     return r
 
 
+cdef enum:
+    _FIELD_BOOL, _FIELD_INT, _FIELD_DOUBLE, _FIELD_STRING, _FIELD_OBJECT, _FIELD_LIST_VALUES
+
+FIELD_BOOL = _FIELD_BOOL
+FIELD_INT = _FIELD_INT
+FIELD_DOUBLE = _FIELD_DOUBLE
+FIELD_STRING = _FIELD_STRING
+FIELD_OBJECT = _FIELD_OBJECT
+FIELD_LIST_VALUES = _FIELD_LIST_VALUES
+
+
+def read_fields(size_t data, tuple fields):
+    """Reads values from 'data' using a table of fields.
+
+    Each field is a tuple of (UTF-8 encoded name, key, kind, convert), where
+    'kind' is one of the FIELD_* constants and 'convert' is None or called
+    with the value before it is stored under 'key' in the result.
+    """
+    cdef void *d = <void*>data
+    cdef void *o
+    cdef bytes b
+    cdef const char *n
+    cdef const char *s
+    cdef int kind
+    cdef dict r = {}
+    for name, key, kind, convert in fields:
+        b = name
+        n = b
+        if kind == _FIELD_BOOL:
+            v = obs_data_get_bool(d, n)
+        elif kind == _FIELD_INT:
+            v = obs_data_get_int(d, n)
+        elif kind == _FIELD_DOUBLE:
+            v = obs_data_get_double(d, n)
+        elif kind == _FIELD_STRING:
+            s = obs_data_get_string(d, n)
+            v = s.decode("utf-8") if s else ""
+        elif kind == _FIELD_OBJECT:
+            o = obs_data_get_obj(d, n)
+            try:
+                v = _read_data(o, None) if o else {}
+            finally:
+                obs_data_release(o)
+        elif kind == _FIELD_LIST_VALUES:
+            o = obs_data_get_array(d, n)
+            try:
+                v = [i.get("value") for i in _read_data_array(o)] if o else []
+            finally:
+                obs_data_array_release(o)
+        else:
+            raise ValueError("unsupported field kind {}".format(kind))
+        if convert is not None:
+            v = convert(v)
+        r[key] = v
+    return r
+
+
+cdef object _view_item(void *d):
+    cdef uint32_t dtype = obs_data_item_gettype(d)
+    cdef void *o
+    if dtype == OBS_DATA_OBJECT:
+        o = obs_data_item_get_obj(d)
+        if not o:
+            return {}
+        try:
+            return DataView(<size_t>o)
+        finally:
+            obs_data_release(o)
+    elif dtype == OBS_DATA_ARRAY:
+        o = obs_data_item_get_array(d)
+        if not o:
+            return []
+        try:
+            return DataArrayView(<size_t>o)
+        finally:
+            obs_data_array_release(o)
+    return _read_item(d)
+
+
+cdef class DataView:
+    """A read-only mapping over an OBS data object.
+
+    Values are converted when they are accessed, and nested objects and
+    arrays are returned as further views. The view holds a reference to
+    the data object until it is closed or garbage collected.
+
+    OBS data objects are not thread-safe, so the view must only be used
+    while nothing else is modifying the object.
+    """
+    cdef void *data
+
+    def __cinit__(self, size_t data):
+        self.data = <void*>data
+        if self.data:
+            obs_data_addref(self.data)
+
+    def __dealloc__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        d = self.data
+        self.data = NULL
+        if d:
+            obs_data_release(d)
+
+    cdef void *_get_item(self, key) except? NULL:
+        cdef bytes b
+        if not self.data:
+            raise ValueError("data view is closed")
+        if not isinstance(key, str):
+            return NULL
+        b = (<str>key).encode("utf-8")
+        return obs_data_item_byname(self.data, b)
+
+    def __getitem__(self, key):
+        cdef void *d = self._get_item(key)
+        if not d:
+            raise KeyError(key)
+        try:
+            return _view_item(d)
+        finally:
+            obs_data_item_release(&d)
+
+    def __contains__(self, key):
+        cdef void *d = self._get_item(key)
+        if not d:
+            return False
+        obs_data_item_release(&d)
+        return True
+
+    def __iter__(self):
+        cdef void *d
+        cdef const char *n
+        if not self.data:
+            raise ValueError("data view is closed")
+        d = obs_data_first(self.data)
+        try:
+            while d:
+                n = obs_data_item_get_name(d)
+                if n and n[0]:
+                    yield n.decode("utf-8")
+                if not obs_data_item_next(&d):
+                    break
+        finally:
+            if d:
+                obs_data_item_release(&d)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return KeysView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def to_dict(self):
+        """Converts the entire object to a dict."""
+        if not self.data:
+            raise ValueError("data view is closed")
+        return _read_data(self.data, None)
+
+
+cdef class DataArrayView:
+    """A read-only sequence of DataView objects over an OBS data array."""
+    cdef void *array
+
+    def __cinit__(self, size_t array):
+        self.array = <void*>array
+        if self.array:
+            obs_data_array_addref(self.array)
+
+    def __dealloc__(self):
+        self.close()
+
+    def close(self):
+        a = self.array
+        self.array = NULL
+        if a:
+            obs_data_array_release(a)
+
+    def __len__(self):
+        if not self.array:
+            return 0
+        return obs_data_array_count(self.array)
+
+    def __getitem__(self, index):
+        cdef void *o
+        cdef Py_ssize_t i, n = len(self)
+        if isinstance(index, slice):
+            return [self[j] for j in range(*index.indices(n))]
+        i = index
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("data array index out of range")
+        o = obs_data_array_item(self.array, i)
+        try:
+            return DataView(<size_t>o)
+        finally:
+            obs_data_release(o)
+
+    def to_list(self):
+        """Converts the entire array to a list of dicts."""
+        if not self.array:
+            return []
+        return _read_data_array(self.array)
+
+
+Mapping.register(DataView)
+Sequence.register(DataArrayView)
+
+
+def write_data(size_t data, key_value_pairs, bint defaults=False):
+    if not data:
+        return
+    if isinstance(key_value_pairs, dict):
+        key_value_pairs = key_value_pairs.items()
+    _write_data(<void*>data, key_value_pairs, defaults)
+
+
+cdef void _write_data(void *data, object key_value_pairs, bint defaults) except *:
+    cdef bytes b, sb
+    cdef const char *n
+    cdef void *o
+    for k, v in key_value_pairs:
+        if not k:
+            continue
+        b = k.encode("utf-8")
+        n = b
+        if v is None:
+            if defaults:
+                obs_data_unset_default_value(data, n)
+            else:
+                obs_data_erase(data, n)
+        # bool is a subclass of int, so check for it first
+        elif v is True or v is False:
+            if defaults:
+                obs_data_set_default_bool(data, n, v)
+            else:
+                obs_data_set_bool(data, n, v)
+        elif isinstance(v, int):
+            if defaults:
+                obs_data_set_default_int(data, n, v)
+            else:
+                obs_data_set_int(data, n, v)
+        elif isinstance(v, float):
+            if defaults:
+                obs_data_set_default_double(data, n, v)
+            else:
+                obs_data_set_double(data, n, v)
+        elif isinstance(v, str):
+            sb = (<str>v).encode("utf-8")
+            if defaults:
+                obs_data_set_default_string(data, n, sb)
+            else:
+                obs_data_set_string(data, n, sb)
+        elif isinstance(v, dict):
+            o = obs_data_create()
+            try:
+                _write_data(o, (<dict>v).items(), False)
+                if defaults:
+                    obs_data_set_default_obj(data, n, o)
+                else:
+                    obs_data_set_obj(data, n, o)
+            finally:
+                obs_data_release(o)
+        elif isinstance(v, (list, tuple)):
+            # OBS has no default values for arrays
+            if not defaults:
+                o = _make_data_array(v)
+                try:
+                    obs_data_set_array(data, n, o)
+                finally:
+                    obs_data_array_release(o)
+        else:
+            raise TypeError("unsupported type '{}'".format(type(v)))
+
+
+cdef void *_make_data_array(object items) except NULL:
+    cdef void *arr = obs_data_array_create()
+    cdef void *o
+    try:
+        for v in items:
+            # Array items are always objects, so store plain values the
+            # way editable lists do.
+            if not isinstance(v, dict):
+                v = {"value": v}
+            o = obs_data_create()
+            try:
+                _write_data(o, (<dict>v).items(), False)
+                obs_data_array_push_back(arr, o)
+            finally:
+                obs_data_release(o)
+    except:
+        obs_data_array_release(arr)
+        raise
+    return arr
+
+
 cdef void _append_filter_data(void *source, void *filter, void *list_obj) nogil:
     cdef const char *name = obs_source_get_name(filter)
     cdef const char *kind = obs_source_get_unversioned_id(filter)
@@ -20,7 +20,7 @@ cdef extern from "graphics/vec4.h" nogil:
     void vec4_zero(vec4* v)
 
 cdef extern from "obs.h" nogil:
-    uint32_t GS_A8, GS_R8
+    uint32_t GS_A8, GS_R8, GS_RGBA, GS_BGRA
     uint32_t GS_ZS_NONE
     uint32_t GS_CLEAR_COLOR, GS_CLEAR_DEPTH
     uint32_t GS_BLEND_ZERO, GS_BLEND_ONE
@@ -51,6 +51,9 @@ cdef extern from "obs.h" nogil:
     void obs_enter_graphics()
     void obs_leave_graphics()
 
+    void obs_add_tick_callback(void (*tick)(void* param, float seconds), void* param)
+    void obs_remove_tick_callback(void (*tick)(void* param, float seconds), void* param)
+
     void* obs_get_source_by_name(const char* name)
     uint32_t obs_source_get_width(void* source)
     uint32_t obs_source_get_height(void* source)
@@ -86,9 +89,35 @@ cdef extern from "obs.h" nogil:
     uint32_t OBS_DATA_OBJECT, OBS_DATA_ARRAY
     uint32_t OBS_DATA_NUM_INVALID, OBS_DATA_NUM_INT, OBS_DATA_NUM_DOUBLE
 
+    void* obs_data_create()
+    void obs_data_addref(void* data)
     void* obs_data_first(void* data)
     void obs_data_release(void* data)
-
+    void obs_data_erase(void* data, const char* name)
+
+    const char* obs_data_get_string(void* data, const char* name)
+    long long obs_data_get_int(void* data, const char* name)
+    double obs_data_get_double(void* data, const char* name)
+    bool obs_data_get_bool(void* data, const char* name)
+    void* obs_data_get_obj(void* data, const char* name)
+    void* obs_data_get_array(void* data, const char* name)
+
+    void obs_data_set_string(void* data, const char* name, const char* val)
+    void obs_data_set_int(void* data, const char* name, long long val)
+    void obs_data_set_double(void* data, const char* name, double val)
+    void obs_data_set_bool(void* data, const char* name, bool val)
+    void obs_data_set_obj(void* data, const char* name, void* obj)
+    void obs_data_set_array(void* data, const char* name, void* array)
+
+    void obs_data_set_default_string(void* data, const char* name, const char* val)
+    void obs_data_set_default_int(void* data, const char* name, long long val)
+    void obs_data_set_default_double(void* data, const char* name, double val)
+    void obs_data_set_default_bool(void* data, const char* name, bool val)
+    void obs_data_set_default_obj(void* data, const char* name, void* obj)
+    void obs_data_unset_default_value(void* data, const char* name)
+
+    void* obs_data_item_byname(void* data, const char* name)
+    void obs_data_item_release(void** d)
     bool obs_data_item_next(void** d)
     const char *obs_data_item_get_name(void* d)
     uint32_t obs_data_item_gettype(void* d)
@@ -100,6 +129,9 @@ cdef extern from "obs.h" nogil:
     void* obs_data_item_get_obj(void* d)
     void* obs_data_item_get_array(void* d)
 
+    void* obs_data_array_create()
+    void obs_data_array_addref(void* array)
+    size_t obs_data_array_push_back(void* array, void* obj)
     size_t obs_data_array_count(void* array)
     void* obs_data_array_item(void* array, size_t i)
     void obs_data_array_release(void* array)
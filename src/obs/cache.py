@@ -0,0 +1,291 @@
+import obspython as _obs
+import threading
+
+__all__ = ["SourceRef", "SourceCache", "SceneItemCache"]
+
+
+class SourceRef:
+    """A weak reference to an OBS source.
+
+    The reference follows the source if it is renamed, and does not keep it
+    alive after it has been removed.
+    """
+    def __init__(self, name, weak):
+        self.name = name
+        self._weak = weak
+        self.settings = None
+        self._version = 0
+        self._watching = False
+        self._update_handler = self._on_update
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"<SourceRef \"{self.name}\">"
+
+    def get(self):
+        """Returns a strong reference to the source, or None if it has been
+        destroyed. The caller must release the reference."""
+        return _obs.obs_weak_source_get_source(self._weak) or None
+
+    def connect(self, *handlers):
+        """Connects each (signal, callback) pair in 'handlers' to the
+        source's signal handler. Returns False if the source is destroyed."""
+        s = self.get()
+        if not s:
+            return False
+        try:
+            sh = _obs.obs_source_get_signal_handler(s)
+            for signal, callback in handlers:
+                _obs.signal_handler_connect(sh, signal, callback)
+        finally:
+            _obs.obs_source_release(s)
+        return True
+
+    def disconnect(self, *handlers):
+        """Disconnects each (signal, callback) pair in 'handlers' from the
+        source's signal handler."""
+        # A destroyed source takes its signal handler with it
+        s = self.get()
+        if not s:
+            return
+        try:
+            sh = _obs.obs_source_get_signal_handler(s)
+            for signal, callback in handlers:
+                _obs.signal_handler_disconnect(sh, signal, callback)
+        finally:
+            _obs.obs_source_release(s)
+
+    def watch(self):
+        """Connects to the source's "update" signal, so that 'settings' is
+        discarded whenever the source changes. Returns the current version
+        to pass to store()."""
+        if not self._watching:
+            if not self.connect(("update", self._update_handler)):
+                return None
+            self._watching = True
+        return self._version
+
+    def unwatch(self):
+        self.settings = None
+        if not self._watching:
+            return
+        self._watching = False
+        self.disconnect(("update", self._update_handler))
+
+    def _on_update(self, calldata):
+        self.invalidate()
+
+    def invalidate(self):
+        """Discards 'settings', including any being read for store()."""
+        self._version += 1
+        self.settings = None
+
+    def store(self, settings, version):
+        """Keeps 'settings' unless the source was updated since 'version'."""
+        if version is not None and version == self._version:
+            self.settings = settings
+
+    def __del__(self):
+        if self._watching:
+            self.unwatch()
+        w, self._weak = self._weak, None
+        if w:
+            _obs.obs_weak_source_release(w)
+
+
+class SourceCache:
+    """Caches weak references to sources by name.
+
+    Entries are dropped when OBS signals that a source was renamed, removed
+    or destroyed, and are checked on every hit in case a signal was missed.
+    """
+    def __init__(self):
+        self._refs = {}
+        self._handlers = []
+
+    def connect(self):
+        self.disconnect()
+        sh = _obs.obs_get_signal_handler()
+        self._handlers = [
+            (sh, "source_rename", self._on_rename),
+            (sh, "source_remove", self._on_remove),
+            (sh, "source_destroy", self._on_remove),
+        ]
+        for h in self._handlers:
+            _obs.signal_handler_connect(*h)
+
+    def disconnect(self):
+        handlers, self._handlers = self._handlers, []
+        for h in handlers:
+            _obs.signal_handler_disconnect(*h)
+
+    def clear(self):
+        refs, self._refs = self._refs, {}
+        for ref in refs.values():
+            ref.unwatch()
+
+    def _drop(self, name, ref=None):
+        if ref is None:
+            ref = self._refs.pop(name, None)
+        elif self._refs.get(name) is ref:
+            del self._refs[name]
+        if ref is not None:
+            ref.unwatch()
+
+    def _on_rename(self, calldata):
+        self._drop(_obs.calldata_string(calldata, "prev_name"))
+
+    def _on_remove(self, calldata):
+        s = _obs.calldata_source(calldata, "source")
+        if s:
+            self._drop(_obs.obs_source_get_name(s))
+
+    def get(self, name):
+        """Returns a strong reference to the named source, or None if there
+        is no such source. The caller must release the reference."""
+        # Signal handlers may remove the entry at any time, but our local
+        # reference keeps the weak reference alive while we use it.
+        ref = self._refs.get(name)
+        if ref is not None:
+            s = ref.get()
+            if s:
+                if _obs.obs_source_get_name(s) == name and not _obs.obs_source_removed(s):
+                    return s
+                _obs.obs_source_release(s)
+            self._drop(name, ref)
+        s = _obs.obs_get_source_by_name(name)
+        if s:
+            self._refs[name] = SourceRef(name, _obs.obs_source_get_weak_source(s))
+        return s
+
+    def ref(self, name):
+        """Returns a SourceRef for the named source, or None."""
+        s = self.get(name)
+        if not s:
+            return None
+        _obs.obs_source_release(s)
+        return self._refs.get(name)
+
+
+class _SceneItems:
+    def __init__(self, ref):
+        self.ref = ref
+        self.items = {}
+        self.handlers = []
+
+
+class SceneItemCache:
+    """Caches references to scene items by scene and source name.
+
+    All entries for a scene are dropped when OBS signals that its items were
+    added, removed or reordered, or that the scene was renamed or removed.
+    Items are also checked on every hit in case a signal was missed.
+    """
+    _SCENE_SIGNALS = ("item_add", "item_remove", "reorder", "refresh")
+
+    def __init__(self):
+        # Signals arrive on other threads, so we hold the lock while taking
+        # a reference to a cached item to keep it from being released.
+        self._lock = threading.Lock()
+        self._scenes = {}
+        self._handlers = []
+
+    def connect(self):
+        self.disconnect()
+        sh = _obs.obs_get_signal_handler()
+        self._handlers = [
+            (sh, "source_rename", self._on_rename),
+            (sh, "source_remove", self._on_remove),
+            (sh, "source_destroy", self._on_remove),
+        ]
+        for h in self._handlers:
+            _obs.signal_handler_connect(*h)
+
+    def disconnect(self):
+        handlers, self._handlers = self._handlers, []
+        for h in handlers:
+            _obs.signal_handler_disconnect(*h)
+
+    def clear(self):
+        with self._lock:
+            scenes, self._scenes = self._scenes, {}
+        for entry in scenes.values():
+            self._release(entry)
+
+    def _drop(self, scene_name, entry=None):
+        with self._lock:
+            if entry is None:
+                entry = self._scenes.pop(scene_name, None)
+            elif self._scenes.get(scene_name) is entry:
+                del self._scenes[scene_name]
+            else:
+                entry = None
+        if entry is not None:
+            self._release(entry)
+
+    def _release(self, entry):
+        handlers, entry.handlers = entry.handlers, []
+        if handlers:
+            entry.ref.disconnect(*handlers)
+        with self._lock:
+            items, entry.items = entry.items, {}
+        for i in items.values():
+            _obs.obs_sceneitem_release(i)
+
+    def _on_rename(self, calldata):
+        self._drop(_obs.calldata_string(calldata, "prev_name"))
+
+    def _on_remove(self, calldata):
+        s = _obs.calldata_source(calldata, "source")
+        if s:
+            self._drop(_obs.obs_source_get_name(s))
+
+    def _watch(self, scene_name, source):
+        entry = _SceneItems(SourceRef(scene_name, _obs.obs_source_get_weak_source(source)))
+        on_change = lambda calldata: self._drop(scene_name, entry)
+        entry.handlers = [(sig, on_change) for sig in self._SCENE_SIGNALS]
+        entry.ref.connect(*entry.handlers)
+        with self._lock:
+            old = self._scenes.get(scene_name)
+            self._scenes[scene_name] = entry
+        if old is not None:
+            self._release(old)
+        return entry
+
+    def get(self, scene_name, name, find):
+        """Returns a strong reference to the item for source 'name' in scene
+        'scene_name', calling 'find(scene_name, name)' for items that are not
+        cached. The caller must release the reference."""
+        with self._lock:
+            entry = self._scenes.get(scene_name)
+            i = entry.items.get(name) if entry else None
+            if i is not None:
+                _obs.obs_sceneitem_addref(i)
+        if i is not None:
+            if _obs.obs_sceneitem_get_scene(i):
+                s = _obs.obs_sceneitem_get_source(i)
+                if s and _obs.obs_source_get_name(s) == name:
+                    return i
+            _obs.obs_sceneitem_release(i)
+            self._drop(scene_name, entry)
+            entry = None
+        scene_source, i = find(scene_name, name)
+        try:
+            if entry is None:
+                entry = self._watch(scene_name, scene_source)
+        except Exception:
+            _obs.obs_sceneitem_release(i)
+            raise
+        finally:
+            _obs.obs_source_release(scene_source)
+        with self._lock:
+            cached = self._scenes.get(scene_name) is entry and name not in entry.items
+            if cached:
+                entry.items[name] = i
+        if cached:
+            # The cache keeps the reference from 'find', so take another
+            # one for the caller.
+            _obs.obs_sceneitem_addref(i)
+        return i
@@ -1,8 +1,25 @@
 import obspython as _obs
-import sys
+import json
+import math
 
 from . import _helper
 
+try:
+    import orjson as _orjson
+except ImportError:
+    _loads = json.loads
+    _dumps = json.dumps
+else:
+    _loads = _orjson.loads
+    def _dumps(obj):
+        return _orjson.dumps(obj).decode("utf-8")
+
+
+# Data objects with at least this many items (including nested items) are
+# read and written through OBS's JSON serializer rather than item by item.
+# Set to None to always go item by item.
+JSON_THRESHOLD = 256
+
 
 def get_value(data, key):
     """Gets the value of item 'key' from OBS data object 'data'"""
@@ -11,84 +28,73 @@ def get_value(data, key):
 
 def get_values(data, keys=None):
     """Gets a dict containing all keys and values from OBS data object 'data'"""
+    if keys is None and JSON_THRESHOLD is not None:
+        if _helper.data_size(data, JSON_THRESHOLD) >= JSON_THRESHOLD:
+            return _get_values_json(data)
     return _helper.read_data(data, keys)
 
 
-def _erase(data, key, obj):
-    _obs.obs_data_erase(data, key)
+def get_view(data):
+    """Gets a read-only mapping over OBS data object 'data' that converts
+    values as they are accessed. Call 'close()' on the view when finished."""
+    return _helper.DataView(data)
 
 
-def _unset_default(data, key, obj):
-    _obs.obs_data_unset_default_value(data, key)
-
-
-def _make_list(arr, obj):
-    d = _obs.obs_data_array_create()
+def _get_values_json(data):
+    # The JSON only contains values that have been set, so start from the
+    # defaults to match what reading each item returns.
+    d = _obs.obs_data_get_defaults(data)
     try:
-        for o in obj:
-            d2 = _obs.obs_data_create()
-            try:
-                set_data(d2, o.items())
-                _obs.obs_data_array_push_back(arr, d2)
-            finally:
-                _obs.obs_data_release(d2)
-        d_, d = d, None
-        return d_
+        r = _loads(_obs.obs_data_get_json(d))
     finally:
-        if d:
+        _obs.obs_data_release(d)
+    r.update(_loads(_obs.obs_data_get_json(data)))
+    r.pop("", None)
+    return r
+
+
+def _json_size(obj):
+    """Counts the values in 'obj', or returns -1 if 'obj' contains values
+    that are not written the same way as JSON."""
+    count = 0
+    if isinstance(obj, dict):
+        items = obj.values()
+    else:
+        items = obj
+        for v in items:
+            if not isinstance(v, dict):
+                return -1
+    for v in items:
+        count += 1
+        if v is None:
+            return -1
+        if isinstance(v, float):
+            # JSON has no NaN or infinity, and OBS rejects text that has them
+            if not math.isfinite(v):
+                return -1
+        elif isinstance(v, int):
+            if not -2**63 <= v < 2**63:
+                return -1
+        elif isinstance(v, (dict, list, tuple)):
+            n = _json_size(v)
+            if n < 0:
+                return n
+            count += n
+    return count
+
+
+def _set_data_json(data, values, erase):
+    d = _obs.obs_data_create_from_json(_dumps(values))
+    if d:
+        try:
+            _obs.obs_data_apply(data, d)
+        finally:
             _obs.obs_data_release(d)
-
-
-def _set_list(data, key, obj):
-    o = _make_list(obj)
-    try:
-        _obs.obs_data_set_array(data, key, o)
-    finally:
-        _obs.obs_data_release(o)
-
-
-def _set_default_list(data, key, obj):
-    pass
-
-
-def _set_obj(data, key, obj):
-    d = _obs.obs_data_create()
-    set_data(d, obj.items())
-    _obs.obs_data_set_obj(data, key, d)
-
-
-def _set_default_string(data, key, string):
-    _obs.obs_data_set_default_string(data, key, sys.intern(string))
-
-
-def _set_default_obj(data, key, obj):
-    d = _obs.obs_data_create()
-    set_data(d, obj.items())
-    _obs.obs_data_set_default_obj(data, key, d)
-
-
-_SET_FUNC = {
-    bool: _obs.obs_data_set_bool,
-    int: _obs.obs_data_set_int,
-    float: _obs.obs_data_set_double,
-    str: _obs.obs_data_set_string,
-    tuple: _set_list,
-    list: _set_list,
-    dict: _set_obj,
-    type(None): _erase,
-}
-
-
-_SET_DEFAULT_FUNC = {
-    bool: _obs.obs_data_set_default_bool,
-    int: _obs.obs_data_set_default_int,
-    float: _obs.obs_data_set_default_double,
-    str: _set_default_string,
-    tuple: _set_default_list,
-    list: _set_default_list,
-    dict: _set_default_obj,
-    type(None): _unset_default,
-}
+    else:
+        # OBS could not parse the text, so write item by item instead
+        _helper.write_data(data, values.items(), False)
+    for k in erase:
+        _obs.obs_data_erase(data, k)
 
 
 def set_data(data, key_value_pairs, defaults=False):
@@ -99,19 +105,17 @@ def set_data(data, key_value_pairs, defaults=False):
     If 'defaults' is True, the default values for the data object are set.
     Otherwise, the current values are set.
     """
-    funcs = _SET_DEFAULT_FUNC if defaults else _SET_FUNC
-    if isinstance(key_value_pairs, dict):
-        key_value_pairs = key_value_pairs.items()
-    for k, v in key_value_pairs:
-        if not k:
-            continue
-        try:
-            funcs[type(v)](data, k, v)
-        except LookupError:
-            for t, fn in funcs.items():
-                if isinstance(v, t):
-                    fn(data, k, v)
-                    break
-            else:
-                raise TypeError("unsupported type '{}'".format(type(v)))
-
+    if not defaults and JSON_THRESHOLD is not None:
+        if isinstance(key_value_pairs, dict):
+            key_value_pairs = key_value_pairs.items()
+        elif not isinstance(key_value_pairs, (list, tuple)):
+            key_value_pairs = list(key_value_pairs)
+        # Only large or nested values can reach the threshold, so most
+        # writes skip measuring them.
+        if (len(key_value_pairs) >= JSON_THRESHOLD
+                or any(isinstance(v, (dict, list, tuple)) for _, v in key_value_pairs)):
+            values = {k: v for k, v in key_value_pairs if k and v is not None}
+            if _json_size(values) >= JSON_THRESHOLD:
+                _set_data_json(data, values, [k for k, v in key_value_pairs if k and v is None])
+                return
+    _helper.write_data(data, key_value_pairs, defaults)
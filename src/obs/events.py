@@ -0,0 +1,75 @@
+import obspython as _obs
+import functools
+import inspect
+
+from .cache import SourceRef
+from .loop import LOOP
+
+__all__ = ["Subscription"]
+
+
+def _item_args(sub, calldata):
+    from .sceneitem import SceneItem
+    from .source import Source
+    source = _obs.obs_sceneitem_get_source(_obs.calldata_sceneitem(calldata, "item"))
+    return SceneItem(sub.source.name, Source(_obs.obs_source_get_name(source))),
+
+
+# Converts the calldata for each signal into extra callback arguments.
+# Signals that are not listed pass no extra arguments.
+_SIGNAL_ARGS = {
+    "rename": lambda sub, calldata: (_obs.calldata_string(calldata, "new_name"),
+                                     _obs.calldata_string(calldata, "prev_name")),
+    "volume": lambda sub, calldata: (_obs.calldata_float(calldata, "volume"),),
+    "mute": lambda sub, calldata: (_obs.calldata_bool(calldata, "muted"),),
+    "item_add": _item_args,
+    "item_remove": _item_args,
+    "item_select": _item_args,
+    "item_deselect": _item_args,
+}
+
+
+class Subscription:
+    """A connection between an OBS signal and a callback.
+
+    Returned from 'Source.on'. Call 'disconnect()' to stop receiving events.
+    """
+    def __init__(self, source, signal, callback):
+        self.source = source
+        self.signal = signal
+        self.callback = callback
+        self._args = _SIGNAL_ARGS.get(signal)
+        self._is_async = inspect.iscoroutinefunction(callback)
+        self._ref = None
+        # Bound methods are created on each access, so keep the one we
+        # connect to be able to disconnect it again.
+        self._handler = self._on_signal
+
+    def __repr__(self):
+        return f"<Subscription {self.signal!r} on {self.source!r}>"
+
+    @property
+    def connected(self):
+        return self._ref is not None
+
+    def _connect(self, source):
+        self._ref = SourceRef(_obs.obs_source_get_name(source),
+                              _obs.obs_source_get_weak_source(source))
+        self._ref.connect((self.signal, self._handler))
+
+    def disconnect(self):
+        ref, self._ref = self._ref, None
+        LOOP._subscriptions.discard(self)
+        if ref is not None:
+            ref.disconnect((self.signal, self._handler))
+
+    def _on_signal(self, calldata):
+        # Signals are raised on OBS threads that may be holding locks, so
+        # we only read the calldata here and hand the callback off.
+        args = self._args(self, calldata) if self._args else ()
+        if self._is_async:
+            LOOP.run_async(self.callback(self.source, *args))
+        else:
+            call = functools.update_wrapper(
+                functools.partial(self.callback, self.source, *args), self.callback)
+            LOOP._events.submit(call)
@@ -1,67 +1,347 @@
 import obspython as _obs
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import copy
 import threading
+import time
 import traceback
+import warnings
 
 from . import data as _data
 from . import _helper
+from .cache import SceneItemCache, SourceCache, SourceRef
 
-class Future:
-    _NOTSET = object()
-    _EXCEPTION = object()
-    _INTERRUPT = object()
-    _WAITING = []
+_InvalidStateError = getattr(concurrent.futures, "InvalidStateError", ())
+
+
+class StepExpired(TimeoutError):
+    pass
+
+class Future(concurrent.futures.Future):
+    """A concurrent.futures.Future for an operation run by the loop.
+
+    Futures may be passed to 'concurrent.futures.wait', awaited from a
+    coroutine, or waited on together with 'obs.wait' and 'obs.gather'.
+    """
 
     def __init__(self):
-        self._result = self._NOTSET
-        self._exception = None
-        self._lock = {}
+        super().__init__()
+        self._batch = None
 
     def has_result(self):
-        return self._result is not self._NOTSET
+        return self.done()
+
+    def _flush(self):
+        b = self._batch
+        if b is not None:
+            # Waiting on a read inside an open batch would never finish, so
+            # send everything collected so far to the main thread first.
+            b.flush()
+
+    def _start(self):
+        try:
+            return self.set_running_or_notify_cancel()
+        except RuntimeError:
+            # Already completed, for example by being interrupted
+            return False
 
     def result(self, timeout=-1):
-        r = self._result
-        if r is not self._NOTSET:
-            if r is self._EXCEPTION:
-                raise RuntimeError(self._exception)
-            elif r is self._INTERRUPT:
-                raise KeyboardInterrupt(self._exception)
-            return r
-        l = self._lock.get("o")
-        if l is None:
-            l = threading.Lock()
-            l.acquire()
-            l = self._lock.setdefault("o", l)
-        r = self._result
-        if r is self._NOTSET:
-            self._WAITING.append(self)
-            try:
-                if not l.acquire(timeout=timeout):
-                    raise TimeoutError()
-            finally:
-                self._WAITING.remove(self)
-            r = self._result
-            if r is self._NOTSET:
-                raise TimeoutError()
-        if r is self._EXCEPTION:
-            raise RuntimeError(self._exception)
-        elif r is self._INTERRUPT:
-            raise KeyboardInterrupt(self._exception)
-        return r
+        if not self.done():
+            self._flush()
+        if timeout is not None and timeout < 0:
+            timeout = None
+        try:
+            return super().result(timeout)
+        except (KeyboardInterrupt, concurrent.futures.CancelledError, StepExpired):
+            raise
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError() from None
+        except Exception as ex:
+            raise RuntimeError(ex) from ex
+
+    def __await__(self):
+        if not self.done():
+            self._flush()
+            loop = asyncio.get_event_loop()
+            done = loop.create_future()
+            def _wake(f):
+                loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+            self.add_done_callback(_wake)
+            yield from done
+        try:
+            return self.result()
+        except KeyboardInterrupt:
+            raise asyncio.CancelledError() from None
 
     def set_result(self, value):
-        self._result = value
-        l = self._lock.pop("o", None)
-        if l is not None:
-            l.release()
+        if not self.done():
+            try:
+                super().set_result(value)
+            except _InvalidStateError:
+                pass
 
-    def set_exception(self, message):
-        self._exception = message
-        self.set_result(self._EXCEPTION)
+    def set_exception(self, exception):
+        if not self.done():
+            try:
+                super().set_exception(exception)
+            except _InvalidStateError:
+                pass
 
     def interrupt(self, message):
-        self._exception = message
-        self.set_result(self._INTERRUPT)
+        self.set_exception(KeyboardInterrupt(message))
+
+
+class _MappedFuture(Future):
+    def __init__(self, future, convert):
+        super().__init__()
+        self._future = future
+        self._convert = convert
+        future.add_done_callback(self._copy)
+
+    def _copy(self, future):
+        if future.cancelled():
+            super().cancel()
+            self.set_running_or_notify_cancel()
+        else:
+            # The conversion is applied by 'result' on the caller's thread
+            exc = future.exception()
+            if exc is not None:
+                self.set_exception(exc)
+            else:
+                self.set_result(future.result())
+
+    def _flush(self):
+        self._future._flush()
+
+    def cancel(self):
+        return self._future.cancel()
+
+    def result(self, timeout=-1):
+        return self._convert(self._future.result(timeout))
+
+
+class _Batch:
+    def __init__(self, loop):
+        self._loop = loop
+        self._depth = 0
+        self.steps = []
+
+    def __enter__(self):
+        tls = self._loop._tls
+        if not self._depth and not getattr(tls, "is_main", False):
+            tls.batch = self
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self._depth -= 1
+        if self._depth:
+            return
+        self._loop._tls.batch = None
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard("Batch was not committed")
+
+    def flush(self):
+        steps, self.steps = self.steps, []
+        for _, _, future in steps:
+            if future:
+                future._batch = None
+        if steps:
+            self._loop._enqueue(self._loop._run_batch, (steps,), None)
+
+    def discard(self, message):
+        steps, self.steps = self.steps, []
+        for _, _, future in steps:
+            if future:
+                future._batch = None
+                future.interrupt(message)
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class _Step:
+    __slots__ = ("fn", "args", "future", "key", "script", "queued", "deadline")
+
+    def __init__(self, fn, args, future, key=None, script=None, deadline=None):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.key = key
+        self.script = script
+        self.queued = time.perf_counter()
+        self.deadline = deadline
+
+
+class _Stats:
+    # Upper bounds in milliseconds of the queue latency histogram buckets
+    BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.max_depth = 0
+        self.commands = {}
+        self.scripts = {}
+
+    def _command(self, fn):
+        name = getattr(fn, "__name__", "").lstrip("_") or repr(fn)
+        c = self.commands.get(name)
+        if c is None:
+            # count, total wait, max wait, total run time, histogram, expired
+            c = self.commands[name] = [0, 0.0, 0.0, 0.0, [0] * (len(self.BUCKETS) + 1), 0]
+        return c
+
+    def expired(self, step):
+        self._command(step.fn)[5] += 1
+
+    def step(self, step, started, finished, fn=None):
+        c = self._command(fn or step.fn)
+        wait = started - step.queued
+        run = finished - started
+        c[0] += 1
+        c[1] += wait
+        if wait > c[2]:
+            c[2] = wait
+        c[3] += run
+        c[4][bisect.bisect_left(self.BUCKETS, wait * 1000)] += 1
+        s = self.scripts.get(step.script)
+        if s is None:
+            s = self.scripts[step.script] = [0, 0.0]
+        s[0] += 1
+        s[1] += run
+
+    def tick(self, started, finished):
+        t = finished - started
+        self.ticks += 1
+        self.tick_time += t
+        if t > self.max_tick_time:
+            self.max_tick_time = t
+
+    def snapshot(self, depth):
+        # The OBS thread may add entries while we read, so copy them first
+        commands = list(self.commands.items())
+        scripts = list(self.scripts.items())
+        bounds = [*self.BUCKETS, None]
+        return {
+            "queue_depth": depth,
+            "max_queue_depth": self.max_depth,
+            "ticks": self.ticks,
+            "tick_time": self.tick_time,
+            "max_tick_time": self.max_tick_time,
+            "commands": {
+                n: {
+                    "count": c[0],
+                    "wait": c[1],
+                    "max_wait": c[2],
+                    "run": c[3],
+                    "histogram": list(zip(bounds, c[4])),
+                    "expired": c[5],
+                } for n, c in commands
+            },
+            "scripts": {
+                n: {"count": c[0], "run": c[1]} for n, c in scripts
+            },
+        }
+
+
+class _Job:
+    __slots__ = ("callable", "key", "script", "abort")
+
+    def __init__(self, callable):
+        self.callable = callable
+        self.key = (getattr(callable, "__module__", None),
+                    getattr(callable, "__qualname__", None) or id(callable))
+        self.script = self.key[0]
+        self.abort = Future()
+
+
+class _WorkerPool:
+    def __init__(self, loop, max_workers=8, idle_timeout=30):
+        self._loop = loop
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.limits = {}
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._running = []
+        self._workers = 0
+        self._idle = 0
+
+    def submit(self, callable, replace=False):
+        job = _Job(callable)
+        with self._cond:
+            if replace:
+                self._cancel(job.key, "Replaced")
+            self._pending.append(job)
+            if len(self._pending) > self._idle:
+                if self._workers < self.max_workers:
+                    self._workers += 1
+                    threading.Thread(target=self._worker, daemon=True).start()
+                else:
+                    warnings.warn("all {} workers are busy, so {!r} will wait for one to "
+                                  "finish".format(self.max_workers, callable), RuntimeWarning)
+            self._cond.notify()
+        return job
+
+    def reset(self, message):
+        with self._cond:
+            self._pending.clear()
+            for job in self._running:
+                job.abort.interrupt(message)
+
+    def _cancel(self, key, message):
+        self._pending = collections.deque(j for j in self._pending if j.key != key)
+        for job in self._running:
+            if job.key == key:
+                job.abort.interrupt(message)
+
+    def _take(self):
+        for job in self._pending:
+            limit = self.limits.get(job.script)
+            if limit is None or sum(1 for j in self._running if j.script == job.script) < limit:
+                self._pending.remove(job)
+                self._running.append(job)
+                return job
+
+    def _worker(self):
+        tls = self._loop._tls
+        tls.is_main = False
+        cond = self._cond
+        while True:
+            with cond:
+                job = self._take()
+                while job is None:
+                    self._idle += 1
+                    notified = cond.wait(self.idle_timeout)
+                    self._idle -= 1
+                    job = self._take()
+                    if job is None and not notified:
+                        self._workers -= 1
+                        return
+            tls.abort = job.abort
+            tls.script = job.script
+            try:
+                job.callable()
+            except KeyboardInterrupt:
+                pass
+            except Exception:
+                traceback.print_exc()
+            finally:
+                tls.batch = None
+                with cond:
+                    self._running.remove(job)
+                    # A job held back by its script's limit may now run
+                    cond.notify()
 
 
 class _SourceReleaser:
@@ -82,54 +362,225 @@ class _SourceReleaser:
 
 class Loop:
     def __init__(self):
-        self.steps = []
+        self.steps = collections.deque()
         self.interval = 10
-        self.steps_per_interval = 10
+        self.budget = 2
+        self.driver = "timer"
+        self.coalesce = False
+        self.settings_cache = False
+        self.diff_updates = False
+        self.max_steps = None
+        self.overflow = "block"
+        self.quotas = {}
+        self._coalesced = {}
+        self._queued = {}
+        # Number of steps still in the queue that will be skipped
+        self._superseded = 0
+        self._blocked = 0
+        # Held while adding or removing steps
+        self._lock = threading.Condition()
+        self.stats = _Stats()
         self._tls = threading.local()
         self._tls.abort = Future()
         self._tls.is_main = True
-        self._threads = []
+        self._pool = _WorkerPool(self)
+        # Signal callbacks get their own workers, so that long running jobs
+        # in the main pool cannot hold them up.
+        self._events = _WorkerPool(self)
         self._started = False
+        # Bound methods are created on each access, so keep the one we pass
+        # to timer_add to be able to remove it again.
+        self._timer_callback = self._process
+        self._ticker = _helper.TickCallback(self._tick)
+        self._ticking = False
+        self._removing = False
+        self._sources = SourceCache()
+        self._sceneitems = SceneItemCache()
+        self._subscriptions = set()
+        self._pipelines = {}
+        self.pipeline_idle_timeout = 5.0
+        self._async_loop = None
+        self._async_lock = threading.Lock()
+        self._async_tasks = set()
 
     def _process(self):
         if not self.steps:
             return
-        todo = self.steps_per_interval
-        steps = self.steps
-        while steps and todo > 0:
-            fn, args, future = steps.pop(0)
-            try:
-                r = fn(*args)
-                if future:
-                    future.set_result(r)
-            except Exception as ex:
-                _obs.remove_current_callback()
-                self._started = False
-                if future:
-                    future.set_exception(ex)
-                traceback.print_exc()
-                return
-            steps = self.steps
-            todo -= 1
+        # Always run at least one step, then keep going until the queue is
+        # empty or we have used up 'budget' milliseconds of this tick.
+        stats = self.stats
+        start = now = time.perf_counter()
+        end = start + self.budget / 1000
+        run_batch = self._run_batch
+        try:
+            while True:
+                # reset() may replace the queue at any time, so always take
+                # the current one under the lock.
+                with self._lock:
+                    if not self.steps:
+                        break
+                    step = self.steps.popleft()
+                    if step.fn is None:
+                        self._superseded -= 1
+                        continue
+                    if step.key is not None:
+                        self._coalesced.pop(step.key, None)
+                    queued = self._queued.get(step.script)
+                    if queued:
+                        self._queued[step.script] = queued - 1
+                    if self._blocked:
+                        self._lock.notify()
+                fn, args, future = step.fn, step.args, step.future
+                if step.deadline is not None and now > step.deadline:
+                    stats.expired(step)
+                    if future:
+                        future.set_exception(StepExpired("operation expired after {:.0f} ms".format(
+                            (now - step.queued) * 1000
+                        )))
+                    continue
+                if future and not future._start():
+                    continue
+                if fn == run_batch:
+                    # Records its own steps
+                    now = fn(*args, step=step)
+                    if now >= end:
+                        break
+                    continue
+                try:
+                    r = fn(*args)
+                    if future:
+                        future.set_result(r)
+                except Exception as ex:
+                    self._stop(current=True)
+                    if future:
+                        future.set_exception(ex)
+                    traceback.print_exc()
+                    return
+                finally:
+                    t = time.perf_counter()
+                    stats.step(step, now, t)
+                    now = t
+                if now >= end:
+                    break
+        finally:
+            stats.tick(start, now)
+
+    def _tick(self):
+        self._process()
+        with self._lock:
+            remove = self._ticking and not self.steps
+            if remove:
+                self._ticking = False
+                self._removing = True
+        if not remove:
+            return
+        self._ticker.remove()
+        # A step queued while we were removing the callback leaves adding it
+        # back to us, so that adds and removes never overlap.
+        with self._lock:
+            self._removing = False
+            wake = self._ticking
+        if wake:
+            self._ticker.add()
+
+    def _wake(self):
+        # Called with self._lock held. Returns True if the caller should add
+        # the tick callback after releasing the lock. _ticking and _removing
+        # only change under the lock, so only one thread ever adds.
+        if self._started and self.driver == "tick" and self.steps and not self._ticking:
+            self._ticking = True
+            return not self._removing
+        return False
 
     def start(self):
         if not self._started:
             self._started = True
-            _obs.timer_add(self._process, self.interval)
+            if self.driver == "tick":
+                with self._lock:
+                    wake = self._wake()
+                if wake:
+                    self._ticker.add()
+            else:
+                _obs.timer_add(self._timer_callback, self.interval)
+
+    def _stop(self, current=False):
+        self._started = False
+        if self.driver == "tick":
+            with self._lock:
+                remove = self._ticking and not self._removing
+                self._ticking = False
+            if remove:
+                self._ticker.remove()
+        elif current:
+            _obs.remove_current_callback()
+        else:
+            _obs.timer_remove(self._timer_callback)
+
+    def set_driver(self, driver):
+        """Selects how queued operations are run on the OBS thread.
+
+        "timer" runs them from a timer every 'interval' milliseconds.
+        "tick" runs them once per video frame, and only while there are
+        operations waiting.
+        """
+        if driver not in ("timer", "tick"):
+            raise ValueError("driver must be 'timer' or 'tick'")
+        if driver == self.driver:
+            return
+        started = self._started
+        if started:
+            self._stop()
+        self.driver = driver
+        if started:
+            self.start()
 
     def reset(self):
-        threads, self._threads = self._threads, []
-        self.steps = []
-        for t in threads:
-            t.interrupt("Resetting")
-        for f in Future._WAITING:
-            f.interrupt("Resetting")
+        with self._lock:
+            steps, self.steps = self.steps, collections.deque()
+            self._coalesced = {}
+            self._queued = {}
+            self._superseded = 0
+            self._lock.notify_all()
+        self._pool.reset("Resetting")
+        self._events.reset("Resetting")
+        for step in steps:
+            if step.future:
+                step.future.interrupt("Resetting")
+            if step.fn == self._run_batch:
+                for _, _, future in step.args[0]:
+                    if future:
+                        future.interrupt("Resetting")
+        tasks, self._async_tasks = self._async_tasks, set()
+        for t in list(tasks):
+            t.cancel()
+        self._sources.clear()
+        self._sources.connect()
+        self._sceneitems.clear()
+        self._sceneitems.connect()
+        for sub in list(self._subscriptions):
+            sub.disconnect()
+        pipelines, self._pipelines = self._pipelines, {}
+        for p, _ in pipelines.values():
+            p.close()
+        _helper.clear_render_pool()
         self.start()
 
-    def schedule(self, cmd, *args, future=None, always=False):
-        self.schedule_call(getattr(self, "_" + cmd), *args, future=future, always=always)
+    def schedule(self, cmd, *args, future=None, always=False, coalesce=None, max_age=None):
+        self.schedule_call(getattr(self, "_" + cmd), *args, future=future,
+                           always=always, coalesce=coalesce, max_age=max_age)
+
+    def schedule_call(self, callable, *args, future=None, always=False, coalesce=None,
+                      max_age=None, deadline=None):
+        """Runs 'callable' on the main thread.
 
-    def schedule_call(self, callable, *args, future=None, always=False):
+        If 'coalesce' is not None and no 'future' is provided, any step with
+        the same key that is still queued is removed and this one is queued
+        at the end, so that only the most recent write to a target is made.
+
+        If 'max_age' seconds pass, or 'time.perf_counter()' passes 'deadline',
+        before the step runs, it is skipped and 'future' raises StepExpired.
+        Operations inside a batch do not expire.
+        """
         if not always:
             try:
                 abort = self._tls.abort
@@ -148,28 +599,211 @@ class Loop:
                     if future:
                         future.set_result(r)
                 return
-        self.steps.append((callable, args, future))
+            batch = getattr(self._tls, "batch", None)
+            if batch is not None:
+                if future:
+                    future._batch = batch
+                batch.steps.append((callable, args, future))
+                return
+        if max_age is not None:
+            expires = time.perf_counter() + max_age
+            deadline = expires if deadline is None else min(deadline, expires)
+        self._enqueue(callable, args, future, None if future else coalesce,
+                      limit=not always, deadline=deadline)
+
+    def _enqueue(self, callable, args, future, key=None, limit=True, deadline=None):
+        script = getattr(self._tls, "script", None)
+        with self._lock:
+            old = self._coalesced.get(key) if key is not None else None
+            if old is not None:
+                # Skip the old step and queue this one at the end, so it
+                # still runs after any other queued write that overlaps it.
+                self._supersede(old)
+            elif limit:
+                self._admit(script)
+            step = _Step(callable, args, future, key, script, deadline)
+            if key is not None:
+                self._coalesced[key] = step
+            self.steps.append(step)
+            self._queued[script] = self._queued.get(script, 0) + 1
+            depth = len(self.steps) - self._superseded
+            wake = self._wake()
+        if wake:
+            self._ticker.add()
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
+
+    def _admit(self, script):
+        # Called with self._lock held. Returns once there is room for another
+        # step from 'script', or raises.
+        while True:
+            full = (self.max_steps is not None
+                    and len(self.steps) - self._superseded >= self.max_steps)
+            quota = self.quotas.get(script)
+            over = quota is not None and self._queued.get(script, 0) >= quota
+            if not full and not over:
+                return
+            if self.overflow == "drop":
+                if self._drop(script if over else None):
+                    continue
+            # Blocking the event loop thread would stall every coroutine, so
+            # it gets QueueFull instead.
+            elif (self.overflow == "block" and not getattr(self._tls, "is_main", False)
+                    and not getattr(self._tls, "is_async", False)):
+                abort = getattr(self._tls, "abort", None)
+                if abort is not None and abort.done():
+                    raise KeyboardInterrupt
+                self._blocked += 1
+                try:
+                    # Interrupted callers are not woken, so check regularly
+                    self._lock.wait(0.5)
+                finally:
+                    self._blocked -= 1
+                continue
+            if over:
+                raise QueueFull("script {} has {} queued operations".format(script, quota))
+            raise QueueFull("loop has {} queued operations".format(self.max_steps))
+
+    def _drop(self, script):
+        # Called with self._lock held. Skips the oldest step with no future,
+        # optionally only from 'script'.
+        for step in self.steps:
+            if step.future is None and step.fn is not None and step.fn != self._run_batch:
+                if script is None or step.script == script:
+                    break
+        else:
+            return False
+        self._supersede(step)
+        return True
+
+    def _supersede(self, step):
+        # Called with self._lock held. Marks 'step' to be skipped, which is
+        # cheaper than removing it from the middle of the queue.
+        step.fn = None
+        step.args = None
+        self._superseded += 1
+        if step.key is not None and self._coalesced.get(step.key) is step:
+            del self._coalesced[step.key]
+        self._queued[step.script] -= 1
+
+    def batch(self):
+        """Collects operations from the current thread into a single step.
+
+        Use as a context manager. Operations are sent to the main thread
+        together when the outermost block exits, and reads inside the block
+        return futures that complete at the same time.
+
+        Coroutines from 'run_async' all share one thread, so they cannot
+        batch without joining each other's batches. Await the '_async'
+        methods together instead.
+        """
+        if getattr(self._tls, "is_async", False):
+            raise RuntimeError("batch() cannot be used in a coroutine")
+        return getattr(self._tls, "batch", None) or _Batch(self)
+
+    def result(self, future, convert=None):
+        if getattr(self._tls, "batch", None) is not None:
+            return _MappedFuture(future, convert) if convert else future
+        r = future.result()
+        return convert(r) if convert else r
+
+    def _run_batch(self, steps, step=None):
+        # Returns the time it finished, after recording each operation
+        # against 'step', the step that ran the batch.
+        stats = self.stats
+        now = time.perf_counter()
+        for fn, args, future in steps:
+            if future and not future._start():
+                continue
+            try:
+                r = fn(*args)
+            except Exception as ex:
+                if future:
+                    future.set_exception(ex)
+                else:
+                    traceback.print_exc()
+            else:
+                if future:
+                    future.set_result(r)
+            if step is not None:
+                t = time.perf_counter()
+                stats.step(step, now, t, fn)
+                now = t
+        return now
+
+    def run(self, callable, replace=False, limit=None):
+        """Runs 'callable' on a worker thread from a shared pool.
+
+        If 'replace' is True, any queued or running call to the same function
+        is cancelled. If 'limit' is given, it sets the maximum number of calls
+        from the same script that may run at once.
+
+        When every worker is busy, 'callable' waits for one to finish and a
+        RuntimeWarning is issued.
+        """
+        if limit is not None:
+            self._pool.limits[getattr(callable, "__module__", None)] = limit
+        self._pool.submit(callable, replace)
+
+    def run_async(self, coro):
+        """Runs coroutine 'coro' on the shared background event loop.
+
+        Returns a concurrent.futures.Future for the coroutine's result.
+        """
+        with self._async_lock:
+            loop = self._async_loop
+            if loop is None:
+                self._async_loop = loop = asyncio.new_event_loop()
+                t = threading.Thread(target=self._run_async_loop, args=(loop,), daemon=True)
+                t.start()
+        f = asyncio.run_coroutine_threadsafe(coro, loop)
+        self._async_tasks.add(f)
+        f.add_done_callback(self._async_tasks.discard)
+        return f
+
+    def _run_async_loop(self, loop):
+        self._tls.is_main = False
+        self._tls.is_async = True
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
 
     def _source_by_name(self, name):
-        s = _obs.obs_get_source_by_name(name)
-        if not s:
-            raise LookupError("no source named {}".format(name))
+        if isinstance(name, SourceRef):
+            s = name.get()
+            if s and _obs.obs_source_removed(s):
+                _obs.obs_source_release(s)
+                s = None
+            if not s:
+                raise LookupError("source {} no longer exists".format(name))
+        else:
+            s = self._sources.get(name)
+            if not s:
+                raise LookupError("no source named {}".format(name))
         return _SourceReleaser(s)
 
     def _filter_by_name(self, source_name, filter_name):
-        s = _obs.obs_get_source_by_name(source_name)
-        if not s:
-            raise LookupError("no source named {}".format(source_name))
-        try:
+        if isinstance(filter_name, SourceRef):
+            return self._source_by_name(filter_name)
+        with self._source_by_name(source_name) as s:
             f = _obs.obs_source_get_filter_by_name(s, filter_name)
             if not f:
                 raise LookupError("no filter named {} on source {}".format(filter_name, source_name))
             return _SourceReleaser(f)
-        finally:
-            _obs.obs_source_release(s)
 
-    def _sceneitem_by_name(self, scene_name, name):
-        with self._source_by_name(scene_name) as source:
+    def _resolve_source(self, source_name, owner_name=None):
+        if owner_name is None:
+            ref = self._sources.ref(source_name)
+            if ref is None:
+                raise LookupError("no source named {}".format(source_name))
+            return ref
+        with self._filter_by_name(owner_name, source_name) as f:
+            return SourceRef(source_name, _obs.obs_source_get_weak_source(f))
+
+    def _find_sceneitem(self, scene_name, name):
+        source = self._sources.get(scene_name)
+        if not source:
+            raise LookupError("no source named {}".format(scene_name))
+        try:
             scene = _obs.obs_scene_from_source(source)
             if not scene:
                 raise LookupError("no scene named {}".format(scene_name))
@@ -177,69 +811,131 @@ class Loop:
             if i is None:
                 raise LookupError("no sceneitem named {}".format(name))
             _obs.obs_sceneitem_addref(i)
-            return _SourceReleaser(i, is_sceneitem=True)
-
-    def _updated(self, props, data, values, on_update):
-        for p in props:
-            values.update(p._get(data))
-        if on_update:
-            on_update()
-
-    def _new_thread(self, callable):
-        def _starter():
-            self._tls.abort = a = Future()
-            self._tls.is_main = False
-            self._threads.append(a)
-            try:
-                callable()
-            except KeyboardInterrupt:
-                pass
-        t = threading.Thread(target=_starter)
-        t.start()
+        except Exception:
+            _obs.obs_source_release(source)
+            raise
+        return source, i
+
+    def _sceneitem_by_name(self, scene_name, name):
+        i = self._sceneitems.get(scene_name, name, self._find_sceneitem)
+        return _SourceReleaser(i, is_sceneitem=True)
+
+    def _updated(self, read, data, on_update):
+        on_update(read(data))
 
     def _obs_source_get_type(self, source_name):
         with self._source_by_name(source_name) as s:
             return _obs.obs_source_get_unversioned_id(s)
 
-    def _obs_source_get_property_values(self, source_name):
-        with self._source_by_name(source_name) as s:
+    def _read_settings(self, s, keys, ref=None):
+        if ref is None or not self.settings_cache:
             d = _obs.obs_source_get_settings(s)
             try:
-                return _data.get_values(d)
+                return _data.get_values(d, keys)
             finally:
                 _obs.obs_data_release(d)
-
-    def _obs_source_set_property_values(self, source_name, values):
-        with self._source_by_name(source_name) as s:
-            d = _obs.obs_data_create()
+        values = ref.settings
+        if values is None:
+            version = ref.watch()
+            d = _obs.obs_source_get_settings(s)
             try:
-                _data.set_data(d, values.items())
-                _obs.obs_source_update(s, d)
+                values = _data.get_values(d)
             finally:
                 _obs.obs_data_release(d)
+            ref.store(values, version)
+        if keys is None:
+            return copy.deepcopy(values)
+        return {k: copy.deepcopy(values[k]) for k in keys if k in values}
 
-    def _obs_filter_get_property_values(self, filter_name, owner_name):
+    def _obs_source_get_property_values(self, source_name, keys=None):
+        with self._source_by_name(source_name) as s:
+            if isinstance(source_name, SourceRef):
+                ref = source_name
+            else:
+                ref = self._sources._refs.get(source_name)
+            return self._read_settings(s, keys, ref)
+
+    def _write_settings(self, s, values, ref=None):
+        if self.diff_updates:
+            current = self._read_settings(s, list(values), ref)
+            values = {k: v for k, v in values.items() if current.get(k) != v}
+            if not values:
+                return
+        d = _obs.obs_data_create()
+        try:
+            _data.set_data(d, values.items())
+            _obs.obs_source_update(s, d)
+        finally:
+            _obs.obs_data_release(d)
+        if ref is None:
+            return
+        # OBS only signals the update on a later tick, so until then keep the
+        # cached settings in step with what we wrote. Values that OBS stores
+        # in another form are read again instead.
+        settings = ref.settings
+        if settings is not None and all(v is None or isinstance(v, (bool, int, float, str))
+                                        for v in values.values()):
+            for k, v in values.items():
+                if v is None:
+                    settings.pop(k, None)
+                else:
+                    settings[k] = v
+        else:
+            ref.invalidate()
+
+    def _obs_source_set_property_values(self, source_name, values):
+        with self._source_by_name(source_name) as s:
+            if isinstance(source_name, SourceRef):
+                ref = source_name
+            else:
+                ref = self._sources._refs.get(source_name)
+            self._write_settings(s, values, ref)
+
+    def _obs_filter_get_property_values(self, filter_name, owner_name, keys=None):
         with self._filter_by_name(owner_name, filter_name) as s:
-            d = _obs.obs_source_get_settings(s)
-            try:
-                return _data.get_values(d)
-            finally:
-                _obs.obs_data_release(d)
+            ref = filter_name if isinstance(filter_name, SourceRef) else None
+            return self._read_settings(s, keys, ref)
 
     def _obs_filter_set_property_values(self, filter_name, owner_name, values):
         with self._filter_by_name(owner_name, filter_name) as s:
-            d = _obs.obs_data_create()
-            try:
-                _data.set_data(d, values.items())
-                _obs.obs_source_update(s, d)
-            finally:
-                _obs.obs_data_release(d)
+            ref = filter_name if isinstance(filter_name, SourceRef) else None
+            self._write_settings(s, values, ref)
 
+    def _obs_source_connect(self, source_name, subscription):
+        with self._source_by_name(source_name) as s:
+            subscription._connect(s)
+            self._subscriptions.add(subscription)
 
+    def _obs_filter_connect(self, filter_name, owner_name, subscription):
+        with self._filter_by_name(owner_name, filter_name) as s:
+            subscription._connect(s)
+            self._subscriptions.add(subscription)
 
-    def _obs_source_get_frame_data(self, source_name):
+    def _obs_source_get_frame_data(self, source_name, pipelined=False, format="r8",
+                                   region=None, size=None):
+        try:
+            color_format = _helper.FRAME_FORMATS[format]
+        except KeyError:
+            raise ValueError("unsupported frame format {}".format(format)) from None
         with self._source_by_name(source_name) as s:
-            return _helper.render_source_to_data(s)
+            if not pipelined:
+                return _helper.render_source_to_data(s, color_format, region, size)
+            key = (str(source_name), format,
+                   None if region is None else tuple(region),
+                   None if size is None else tuple(size))
+            now = time.monotonic()
+            entry = self._pipelines.get(key)
+            if entry is None:
+                entry = self._pipelines[key] = [_helper.FramePipeline(), now]
+            entry[1] = now
+            # Close pipelines that callers have stopped using, as the render
+            # pool does for its objects.
+            cutoff = now - self.pipeline_idle_timeout
+            for k, (p, used) in list(self._pipelines.items()):
+                if used < cutoff:
+                    del self._pipelines[k]
+                    p.close()
+            return entry[0].capture(s, color_format, region, size)
 
     def _close_object(self, obj):
         obj.close()
@@ -14,9 +14,43 @@ def render(elements, on_changed):
     return p
 
 
+def compile_reader(elements):
+    """Returns a function that reads the values of all 'elements' from an
+    OBS data object into a dict.
+
+    Values with a plain type are read by a single native call. Other
+    elements have their '_get' method called in order.
+    """
+    steps = []
+    fields = []
+    for e in elements:
+        for r in e._readers():
+            if isinstance(r, tuple):
+                name, kind, convert = r
+                fields.append((name.encode("utf-8"), name, kind, convert))
+                continue
+            if fields:
+                steps.append(tuple(fields))
+                fields = []
+            steps.append(r)
+    if fields:
+        steps.append(tuple(fields))
+
+    def read(data):
+        values = {}
+        for step in steps:
+            if isinstance(step, tuple):
+                values.update(_helper.read_fields(data, step))
+            else:
+                values.update(step._get(data))
+        return values
+    return read
+
+
 class _Property:
     def __init__(self, name, text, doc=None, visible=True, enabled=True):
         self.__property = []
+        self.__reader = None
         self.name = name
         self.text = text
         self.doc = doc
@@ -63,6 +97,22 @@ class _Property:
         v = self._get(data)
         return v.get(self.name, None)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls._readers is _Property._readers:
+            raise TypeError("{} must define _readers".format(cls.__name__))
+
+    def _readers(self):
+        # Yields (name, kind, convert) for each value that can be read
+        # natively, or a property whose '_get' should be called.
+        raise NotImplementedError
+
+    def _get(self, data):
+        read = self.__reader
+        if read is None:
+            read = self.__reader = compile_reader([self])
+        return read(data)
+
 
 class Group(_Property):
     """Defines a group box that contains other properties.
@@ -97,11 +147,10 @@ class Group(_Property):
         for e in self.elements:
             e._defaults(data)
 
-    def _get(self, data):
-        d = {self.name: _obs.obs_data_get_bool(data, self.name)}
+    def _readers(self):
+        yield self.name, _helper.FIELD_BOOL, None
         for e in self.elements:
-            d.update(e._get(data))
-        return d
+            yield from e._readers()
 
 
 class Text(_Property):
@@ -136,8 +185,8 @@ class Text(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        return {self.name: _obs.obs_data_get_string(data, self.name)}
+    def _readers(self):
+        yield self.name, _helper.FIELD_STRING, None
 
 
 class Checkbox(_Property):
@@ -154,8 +203,8 @@ class Checkbox(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        return {self.name: _obs.obs_data_get_bool(data, self.name)}
+    def _readers(self):
+        yield self.name, _helper.FIELD_BOOL, None
 
 
 class Number(_Property):
@@ -202,12 +251,9 @@ class Number(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        if self.type is float:
-            v = _obs.obs_data_get_double(data, self.name)
-        else:
-            v = _obs.obs_data_get_int(data, self.name)
-        return {self.name: v}
+    def _readers(self):
+        kind = _helper.FIELD_DOUBLE if self.type is float else _helper.FIELD_INT
+        yield self.name, kind, None
 
 
 class Path(_Property):
@@ -244,9 +290,20 @@ class Path(_Property):
         v = pathlib.Path(self.default) if self.default else None
         _data.set_data(data, {self.name: v}, defaults=True)
 
-    def _get(self, data):
-        p = _obs.obs_data_get_string(data, self.name)
-        return {self.name: pathlib.Path(p) if p else None}
+    def _readers(self):
+        yield self.name, _helper.FIELD_STRING, _path_or_none
+
+
+def _path_or_none(p):
+    return pathlib.Path(p) if p else None
+
+
+def _none_if_empty(n):
+    return n if n else None
+
+
+def _source_or_none(n):
+    return _Source(n) if n else None
 
 
 def _pairs(items):
@@ -295,14 +352,14 @@ class DropDown(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
+    def _readers(self):
         if self.type is float:
-            v = _obs.obs_data_get_double(data, self.name)
+            kind = _helper.FIELD_DOUBLE
         elif self.type is int:
-            v = _obs.obs_data_get_int(data, self.name)
+            kind = _helper.FIELD_INT
         else:
-            v = _obs.obs_data_get_string(data, self.name)
-        return {self.name: v}
+            kind = _helper.FIELD_STRING
+        yield self.name, kind, None
 
 
 class List(_Property):
@@ -335,13 +392,8 @@ class List(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        o = _obs.obs_data_get_array(data, self.name)
-        try:
-            values = [v.get("value") for v in _helper.read_data_array(o)]
-        finally:
-            _obs.obs_data_array_release(o)
-        return {self.name: values}
+    def _readers(self):
+        yield self.name, _helper.FIELD_LIST_VALUES, None
 
 
 class Color(_Property):
@@ -361,8 +413,8 @@ class Color(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        return {self.name: _obs.obs_data_get_int(data, self.name)}
+    def _readers(self):
+        yield self.name, _helper.FIELD_INT, None
 
 
 class Font(_Property):
@@ -388,12 +440,8 @@ class Font(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: self.default}, defaults=True)
 
-    def _get(self, data):
-        o = _obs.obs_data_get_obj(data, self.name)
-        try:
-            d = _helper.read_data(o, None)
-        finally:
-            _obs.obs_data_release(o)
+    @staticmethod
+    def _convert(d):
         f = d.get("flags", 0)
         d.update({
             "bold": bool(f & _obs.OBS_FONT_BOLD),
@@ -401,7 +449,10 @@ class Font(_Property):
             "underline": bool(f & _obs.OBS_FONT_UNDERLINE),
             "strikeout": bool(f & _obs.OBS_FONT_STRIKEOUT),
         })
-        return {self.name: d}
+        return d
+
+    def _readers(self):
+        yield self.name, _helper.FIELD_OBJECT, self._convert
 
 
 def _button_call(properties, btn):
@@ -426,8 +477,8 @@ class Button(_Property):
     def _defaults(self, data):
         pass
 
-    def _get(self, data):
-        return {}
+    def _readers(self):
+        return ()
 
 
 
@@ -468,6 +519,9 @@ class Migrate(_Property):
     def _defaults(self, data):
         pass
 
+    def _readers(self):
+        yield self
+
     def _get(self, data):
         if self.new_name:
             try:
@@ -516,9 +570,8 @@ class SceneList(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: None}, defaults=True)
 
-    def _get(self, data):
-        n = _obs.obs_data_get_string(data, self.name)
-        return {self.name: n if n else None}
+    def _readers(self):
+        yield self.name, _helper.FIELD_STRING, _none_if_empty
 
 
 class SourceList(_Property):
@@ -556,9 +609,8 @@ class SourceList(_Property):
     def _defaults(self, data):
         _data.set_data(data, {self.name: None}, defaults=True)
 
-    def _get(self, data):
-        n = _obs.obs_data_get_string(data, self.name)
-        return {self.name: _Source(n) if n else None}
+    def _readers(self):
+        yield self.name, _helper.FIELD_STRING, _source_or_none
 
 
 class TextSources(SourceList):
@@ -678,6 +730,9 @@ class SceneItemList(_Property):
         self._do_update(data, self._items, self.name, self.item_name)
         _data.set_data(data, {self.name: None, self.item_name: None}, defaults=True)
 
+    def _readers(self):
+        yield self
+
     def _get(self, data):
         s1 = _obs.obs_data_get_string(data, self.name)
         s2 = _obs.obs_data_get_string(data, self.item_name)
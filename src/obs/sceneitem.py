@@ -11,13 +11,23 @@ class SceneItem:
         self._type = type_
         self.owner = owner
 
-    def _do(self, cmd, *args, future=None):
-        LOOP.schedule(cmd, self.scene_name, self.source.name, *args, future=future)
+    def _do(self, cmd, *args, future=None, max_age=None):
+        LOOP.schedule(cmd, self.scene_name, self.source.name, *args,
+                      future=future, max_age=max_age)
 
-    def _call(self, cmd, *args):
+    def _write(self, cmd, *args):
+        coalesce = (cmd, self.scene_name, self.source.name) if LOOP.coalesce else None
+        LOOP.schedule(cmd, self.scene_name, self.source.name, *args, coalesce=coalesce)
+
+    def _call(self, cmd, *args, max_age=None):
+        f = Future()
+        self._do(cmd, *args, future=f, max_age=max_age)
+        return LOOP.result(f)
+
+    def _call_async(self, cmd, *args, max_age=None):
         f = Future()
-        self._do(cmd, *args, future=f)
-        return f.result()
+        self._do(cmd, *args, future=f, max_age=max_age)
+        return f
 
     def __repr__(self):
         return f'<"{self.source.name}" in "{self.scene_name}">'
@@ -33,14 +43,20 @@ class SceneItem:
     def __ne__(self, other):
         return not self.__eq__(other)
 
-    def get_pos(self):
-        return self._call("obs_sceneitem_get_pos")
+    def get_pos(self, max_age=None):
+        return self._call("obs_sceneitem_get_pos", max_age=max_age)
+
+    def get_pos_async(self, max_age=None):
+        return self._call_async("obs_sceneitem_get_pos", max_age=max_age)
 
     def set_pos(self, x, y):
-        self._do("obs_sceneitem_set_pos", (x, y))
+        self._write("obs_sceneitem_set_pos", (x, y))
 
     def get_crop(self):
         return self._call("obs_sceneitem_get_crop")
 
+    def get_crop_async(self):
+        return self._call_async("obs_sceneitem_get_crop")
+
     def set_crop(self, left, right, top, bottom):
-        self._do("obs_sceneitem_set_crop", (left, right, top, bottom))
+        self._write("obs_sceneitem_set_crop", (left, right, top, bottom))
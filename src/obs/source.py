@@ -1,8 +1,28 @@
-from .loop import Future, LOOP
+from . import _helper
+from .events import Subscription
+from .loop import Future, LOOP, StepExpired, _MappedFuture
 
 __all__ = ["Source"]
 
 
+def _frame_args(format, region, size):
+    # Errors raised on the OBS thread would stop the loop for every script,
+    # so check the arguments before scheduling the capture.
+    if format not in _helper.FRAME_FORMATS:
+        raise ValueError("unsupported frame format {}".format(format))
+    if region is not None:
+        x, y, w, h = (float(v) for v in region)
+        if w < 1 or h < 1:
+            raise ValueError("region must be at least one pixel wide and high")
+        region = x, y, w, h
+    if size is not None:
+        cx, cy = (int(v) for v in size)
+        if cx < 1 or cy < 1:
+            raise ValueError("size must be at least one pixel wide and high")
+        size = cx, cy
+    return region, size
+
+
 class FrameData:
     def __init__(self, _future):
         self._future = _future
@@ -31,10 +51,27 @@ class FrameData:
     def depth(self):
         return self._future.result().depth
 
+    def view(self):
+        """Returns a read-only memoryview of the pixels without copying them.
+
+        The frame is not released until the view is also released.
+        """
+        return memoryview(self._future.result())
+
+    def as_array(self):
+        """Returns a read-only NumPy array of the pixels without copying them.
+
+        The array has shape (height, width) for single channel formats and
+        (height, width, depth) otherwise. The frame is not released until
+        the array is also released. Requires NumPy to be installed.
+        """
+        import numpy
+        return numpy.asarray(self.view())
+
     def close(self):
         try:
             d = self._future.result()
-        except RuntimeError:
+        except (RuntimeError, StepExpired):
             pass
         else:
             LOOP.schedule("close_object", d, always=True)
@@ -45,14 +82,56 @@ class Source:
         self.name = name
         self._type = type_
         self.owner = owner
+        self._ref = None
+
+    def _do(self, cmd, *args, future=None, max_age=None):
+        LOOP.schedule(cmd, self._ref or self.name, *args, future=future, max_age=max_age)
+
+    def _write(self, cmd, key, *args):
+        coalesce = (cmd, self.name, key) if LOOP.coalesce else None
+        LOOP.schedule(cmd, self._ref or self.name, *args, coalesce=coalesce)
+
+    def bind(self):
+        """Resolves the source now, so that later operations do not need to
+        look it up by name.
+
+        A bound source continues to refer to the same OBS source if it is
+        renamed, and raises LookupError once it has been removed.
+        """
+        if not self._ref:
+            f = Future()
+            LOOP.schedule("resolve_source", self.name, self.owner.name if self.owner else None, future=f)
+            self._ref = f.result()
+        return self
+
+    def on(self, signal, callback):
+        """Calls 'callback(source, *args)' whenever this source emits OBS
+        signal 'signal', such as "update", "activate", "rename" or
+        "media_ended". Scenes also emit "item_add" and "item_remove", which
+        pass the SceneItem.
+
+        Callbacks run on a worker thread, or on the shared event loop if
+        'callback' is a coroutine function. Returns a Subscription; call its
+        'disconnect()' method to stop receiving events.
+        """
+        sub = Subscription(self, signal, callback)
+        f = Future()
+        if self.owner:
+            self._do("obs_filter_connect", self.owner.name, sub, future=f)
+        else:
+            self._do("obs_source_connect", sub, future=f)
+        f.result()
+        return sub
 
-    def _do(self, cmd, *args, future=None):
-        LOOP.schedule(cmd, self.name, *args, future=future)
+    def _call(self, cmd, *args, convert=None):
+        f = Future()
+        self._do(cmd, *args, future=f)
+        return LOOP.result(f, convert)
 
-    def _call(self, cmd, *args):
+    def _call_async(self, cmd, *args, convert=None):
         f = Future()
         self._do(cmd, *args, future=f)
-        return f.result()
+        return _MappedFuture(f, convert) if convert else f
 
     def __repr__(self):
         return f"<{self._type or 'Source'} \"{self.name}\">"
@@ -69,43 +148,101 @@ class Source:
     def get_type(self):
         if self._type:
             return self._type
-        f = Future()
-        self._do("obs_source_get_type", future=f)
-        return f.result()
+        return self._call("obs_source_get_type")
 
-    def __getitem__(self, key):
-        if self.owner:
-            values = self._call("obs_filter_get_property_values", self.owner.name)
-        else:
-            values = self._call("obs_source_get_property_values")
+    def get_type_async(self):
+        if self._type:
+            f = Future()
+            f.set_result(self._type)
+            return f
+        return self._call_async("obs_source_get_type")
+
+    @staticmethod
+    def _key_convert(key):
         if isinstance(key, slice):
             if key.start or key.stop or key.step:
                 raise KeyError("sources only support [:] slices")
-            return values
+            return None
         elif isinstance(key, tuple):
-            return {k: values[k] for k in key}
-        else:
-            return values[key]
+            return lambda values: {k: values[k] for k in key}
+        return lambda values: values[key]
+
+    @staticmethod
+    def _key_names(key):
+        if isinstance(key, slice):
+            return None
+        elif isinstance(key, tuple):
+            return list(key)
+        return [key]
+
+    def __getitem__(self, key):
+        convert = self._key_convert(key)
+        keys = self._key_names(key)
+        if self.owner:
+            return self._call("obs_filter_get_property_values", self.owner.name, keys, convert=convert)
+        return self._call("obs_source_get_property_values", keys, convert=convert)
+
+    def get_async(self, key):
+        """Returns an awaitable for 'self[key]'."""
+        convert = self._key_convert(key)
+        keys = self._key_names(key)
+        if self.owner:
+            return self._call_async("obs_filter_get_property_values", self.owner.name, keys, convert=convert)
+        return self._call_async("obs_source_get_property_values", keys, convert=convert)
 
     def __setitem__(self, key, value):
         if self.owner:
-            self._do("obs_filter_set_property_values", self.owner.name, {key: value})
+            self._write("obs_filter_set_property_values", (self.owner.name, key),
+                        self.owner.name, {key: value})
         else:
-            self._do("obs_source_set_property_values", {key: value})
+            self._write("obs_source_set_property_values", key, {key: value})
 
     def update(self, key_values):
-        self._do("obs_source_set_property_values", dict(key_values))
+        values = dict(key_values)
+        self._write("obs_source_set_property_values", tuple(sorted(values)), values)
 
     def get_filters(self):
         return self._call("obs_source_get_filters", lambda n, k: Source(n, k, owner=self))
 
-    def get_frame(self):
+    def get_filters_async(self):
+        return self._call_async("obs_source_get_filters", lambda n, k: Source(n, k, owner=self))
+
+    def get_frame(self, max_age=None, pipelined=False, format="r8", region=None, size=None):
+        """Captures the current frame of the source.
+
+        'format' is "r8" or "a8" for one byte per pixel, or "rgba" or "bgra"
+        for four.
+
+        'region' is an (x, y, width, height) rectangle to capture instead of
+        the whole source, and 'size' is a (width, height) to scale the
+        capture to before it is copied from the GPU.
+
+        If 'max_age' is given and the capture has not started within that
+        many seconds, reading the frame raises StepExpired.
+
+        If 'pipelined' is True, the frame copied to the CPU by the previous
+        pipelined capture is returned, and the current frame will be
+        returned by the next one. This avoids waiting for the GPU at the
+        cost of one capture of latency.
+        """
+        region, size = _frame_args(format, region, size)
         f = Future()
-        self._do("obs_source_get_frame_data", future=f)
+        self._do("obs_source_get_frame_data", pipelined, format, region, size,
+                 future=f, max_age=max_age)
         return FrameData(f)
 
+    def get_frame_async(self, max_age=None, pipelined=False, format="r8", region=None, size=None):
+        region, size = _frame_args(format, region, size)
+        f = Future()
+        self._do("obs_source_get_frame_data", pipelined, format, region, size,
+                 future=f, max_age=max_age)
+        return _MappedFuture(f, lambda _: FrameData(f))
+
     def get_sync_offset(self):
         return self._call("obs_source_get_sync_offset")
 
+    def get_sync_offset_async(self):
+        return self._call_async("obs_source_get_sync_offset")
+
     def set_sync_offset(self, offset):
-        self._do("obs_source_set_sync_offset", offset)
+        self._write("obs_source_set_sync_offset", None, offset)
@@ -0,0 +1,142 @@
+import pathlib
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+
+def _stub(name, **attrs):
+    # obspython and the compiled helper only exist inside OBS, but the queue
+    # logic is pure Python and only needs the names to resolve.
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    mod.__getattr__ = lambda attr: (lambda *a, **k: None)
+    return mod
+
+
+class _TickCallback:
+    def __init__(self, callback):
+        self.callback = callback
+
+    def add(self):
+        pass
+
+    def remove(self):
+        pass
+
+
+sys.modules.setdefault("obspython", _stub("obspython"))
+try:
+    import obs._helper
+except ImportError:
+    sys.modules["obs._helper"] = _stub("obs._helper", TickCallback=_TickCallback)
+
+from obs import cache as _cache
+from obs import loop as _loop
+from obs import source as _source
+
+
+@pytest.fixture
+def loop(monkeypatch):
+    loop = _loop.Loop()
+    loop.coalesce = True
+    loop._tls.is_main = False
+    monkeypatch.setattr(_source, "LOOP", loop)
+    return loop
+
+
+@pytest.fixture
+def settings(loop, monkeypatch):
+    # A single source named "s" whose settings are this dict
+    settings = {"a": 1, "b": 1}
+    written = {}
+    monkeypatch.setattr(_loop._obs, "obs_weak_source_get_source", lambda w: object(), raising=False)
+    monkeypatch.setattr(_loop._obs, "obs_source_update",
+                        lambda s, d: settings.update(written), raising=False)
+    monkeypatch.setattr(_loop._data, "get_values",
+                        lambda d, keys=None: {k: v for k, v in settings.items()
+                                              if keys is None or k in keys})
+    monkeypatch.setattr(_loop._data, "set_data", lambda d, values: written.update(values))
+    monkeypatch.setattr(loop, "_source_by_name", lambda name: _loop._SourceReleaser(object()))
+    loop._sources._refs["s"] = _cache.SourceRef("s", None)
+    loop.settings_cache = True
+    return settings
+
+
+def test_coalesce_last_write_wins(loop):
+    written = {}
+    loop._obs_source_set_property_values = lambda name, values: written.update(values)
+    s = _source.Source("s")
+    s["a"] = 1
+    s.update({"a": 2, "b": 2})
+    s["a"] = 3
+    assert len(loop.steps) - loop._superseded == 2
+    loop._process()
+    assert written == {"a": 3, "b": 2}
+
+
+def test_coalesce_replaces_update(loop):
+    written = []
+    loop._obs_source_set_property_values = lambda name, values: written.append(values)
+    s = _source.Source("s")
+    s.update({"a": 1, "b": 1})
+    s["a"] = 2
+    s.update({"a": 3, "b": 3})
+    loop._process()
+    assert written == [{"a": 2}, {"a": 3, "b": 3}]
+
+
+def test_batch_records_each_step(loop):
+    def first():
+        pass
+
+    def second():
+        pass
+
+    with loop.batch():
+        loop.schedule_call(first)
+        loop.schedule_call(second)
+    loop._process()
+    commands = loop.stats.snapshot(0)["commands"]
+    assert sorted(commands) == ["first", "second"]
+    assert commands["first"]["count"] == 1
+
+
+def test_block_raises_on_event_loop_thread(loop):
+    loop.max_steps = 1
+    loop._tls.is_async = True
+    loop.schedule_call(print)
+    with pytest.raises(_loop.QueueFull):
+        loop.schedule_call(print)
+
+
+def test_settings_cache_read_after_write(loop, settings):
+    assert loop._obs_source_get_property_values("s") == {"a": 1, "b": 1}
+    loop._obs_source_set_property_values("s", {"a": 2})
+    assert loop._obs_source_get_property_values("s") == {"a": 2, "b": 1}
+
+
+def test_diff_updates_write_back(loop, settings):
+    loop.diff_updates = True
+    loop._obs_source_get_property_values("s")
+    loop._obs_source_set_property_values("s", {"a": 2})
+    loop._obs_source_set_property_values("s", {"a": 1})
+    assert settings["a"] == 1
+
+
+def test_batch_raises_on_event_loop_thread(loop):
+    loop._tls.is_async = True
+    with pytest.raises(RuntimeError):
+        loop.batch()
+
+
+def test_drop_skips_oldest_write(loop):
+    written = []
+    loop.max_steps = 2
+    loop.overflow = "drop"
+    for i in range(3):
+        loop.schedule_call(written.append, i)
+    loop._process()
+    assert written == [1, 2]